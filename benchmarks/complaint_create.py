@@ -0,0 +1,129 @@
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+import local_settings
+
+local_settings.apply()
+
+import database_definition  # noqa: E402
+from managers import complaints, jobs, queries  # noqa: E402
+from models.complaint import complaint  # noqa: E402
+from models.job import job  # noqa: E402
+from models.photo import photo  # noqa: E402
+from models.user_cs import user_cs  # noqa: E402
+from models.user_cs_complaint import user_cs_complaint  # noqa: E402
+
+
+async def sequential(user_uuid, values, photo_values):
+    # The baseline a handler would write: one statement per table inside a
+    # transaction.
+    database = database_definition.database
+    async with database.transaction():
+        created_photo = await queries.insert_returning(
+            photo, {"uuid": uuid.uuid4(), **photo_values}, photo.c.uuid
+        )
+        created = await queries.insert_returning(
+            complaint,
+            {"uuid": uuid.uuid4(), "photo_uuid": created_photo["uuid"], **values},
+        )
+        await database.execute(
+            user_cs_complaint.insert().values(
+                uuid=uuid.uuid4(), user_uuid=user_uuid, complaint_uuid=created["uuid"]
+            )
+        )
+        await database.execute(
+            job.insert().values(
+                jobs.enqueue_values("thumbnail", {"key": photo_values["url"]})
+            )
+        )
+    return created
+
+
+async def single_statement(user_uuid, values, photo_values):
+    return await complaints.create_complaint(user_uuid, values, photo_values)
+
+
+async def measure(name, create, user_uuid, prefix, count, statements):
+    prefix = f"{prefix}{name[:3]}{len(statements)}-"
+    latencies = []
+    before = len(statements)
+    for index in range(count):
+        tag = f"{prefix}{index}"
+        start = time.perf_counter()
+        await create(
+            user_uuid,
+            {"title": tag, "description": f"complaint {tag}", "amount": 10.0},
+            {"title": tag, "description": f"photo {tag}", "url": f"bench/{tag}"},
+        )
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print(
+        f"{name:>16} {(len(statements) - before) / count:>11.1f} "
+        f"{statistics.median(latencies) * 1000:>9.2f} "
+        f"{latencies[int(len(latencies) * 0.95) - 1] * 1000:>9.2f}"
+    )
+
+
+async def cleanup(prefix: str, user_uuid):
+    database = database_definition.database
+    await database.execute(
+        user_cs_complaint.delete().where(user_cs_complaint.c.user_uuid == user_uuid)
+    )
+    await database.execute(
+        complaint.delete().where(complaint.c.title.startswith(prefix))
+    )
+    await database.execute(photo.delete().where(photo.c.title.startswith(prefix)))
+    await database.execute(
+        job.delete().where(job.c.payload["key"].astext.startswith(f"bench/{prefix}"))
+    )
+    await database.execute(user_cs.delete().where(user_cs.c.uuid == user_uuid))
+
+
+async def run(args):
+    database = database_definition.database
+    prefix = f"cc{uuid.uuid4().hex[:6]}"
+    user_uuid = uuid.uuid4()
+    statements = []
+    await database.connect()
+    try:
+        await database.execute(
+            user_cs.insert().values(
+                uuid=user_uuid,
+                username=prefix,
+                email=f"{prefix}@example.com",
+                password="x",
+                is_active=True,
+            )
+        )
+        # Every call below runs on this task's connection, so the logger sees
+        # each statement sent to the server, BEGIN and COMMIT included.
+        async with database.connection() as connection:
+            connection.raw_connection.add_query_logger(statements.append)
+            print(f"{'path':>16} {'round trips':>11} {'p50 ms':>9} {'p95 ms':>9}")
+            for _ in range(args.rounds):
+                await measure(
+                    "sequential", sequential, user_uuid, prefix, args.count, statements
+                )
+                await measure(
+                    "single statement",
+                    single_statement,
+                    user_uuid,
+                    prefix,
+                    args.count,
+                    statements,
+                )
+    finally:
+        await cleanup(prefix, user_uuid)
+        await database.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Complaint creation: CTE statement vs sequential inserts"
+    )
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=2)
+    args = parser.parse_args()
+    asyncio.run(run(args))
@@ -0,0 +1,175 @@
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import time
+import uuid
+import local_settings
+
+local_settings.apply()
+
+import httpx  # noqa: E402
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+import database_definition  # noqa: E402
+import main  # noqa: E402
+from models.user_cs import user_cs  # noqa: E402
+
+
+def percentile(latencies: list[float], fraction: float) -> float:
+    ordered = sorted(latencies)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_scenario(name: str, requests, concurrency: int) -> dict:
+    queue = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+    latencies = []
+    statuses = {}
+
+    async def worker():
+        while not queue.empty():
+            request = queue.get_nowait()
+            start = time.perf_counter()
+            response = await request()
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    result = {
+        "scenario": name,
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "statuses": statuses,
+    }
+    print(
+        f"{name:>8}: {result['requests_per_second']:8.1f} req/s "
+        f"p50 {result['p50_ms']:7.1f} ms p95 {result['p95_ms']:7.1f} ms "
+        f"p99 {result['p99_ms']:7.1f} ms statuses {statuses}"
+    )
+    return result
+
+
+async def run(args) -> dict:
+    prefix = f"lt{uuid.uuid4().hex[:6]}"
+    usernames = [f"{prefix}{index}" for index in range(args.users)]
+    password = "load-test-password"
+    results = []
+
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://load"
+        ) as client:
+            try:
+                results.append(
+                    await run_scenario(
+                        "register",
+                        [
+                            lambda username=username: client.post(
+                                "/register/",
+                                json={
+                                    "username": username,
+                                    "email": f"{username}@example.com",
+                                    "password": password,
+                                },
+                            )
+                            for username in usernames
+                        ],
+                        args.concurrency,
+                    )
+                )
+                # New users are inactive and there is no activation flow yet.
+                await database_definition.database.execute(
+                    user_cs.update()
+                    .where(user_cs.c.username.startswith(prefix))
+                    .values(is_active=True)
+                )
+                tokens = []
+
+                async def login(username):
+                    response = await client.post(
+                        "/login/", data={"username": username, "password": password}
+                    )
+                    if response.status_code == 201:
+                        tokens.append(response.json()["access_token"])
+                    return response
+
+                results.append(
+                    await run_scenario(
+                        "login",
+                        [
+                            lambda username=username: login(username)
+                            for username in usernames
+                        ],
+                        args.concurrency,
+                    )
+                )
+                if tokens:
+                    results.append(
+                        await run_scenario(
+                            "me",
+                            [
+                                lambda token=tokens[index % len(tokens)]: client.get(
+                                    "/users/me/",
+                                    headers={"Authorization": f"Bearer {token}"},
+                                )
+                                for index in range(args.requests)
+                            ],
+                            args.concurrency,
+                        )
+                    )
+            finally:
+                await database_definition.database.execute(
+                    user_cs.delete().where(user_cs.c.username.startswith(prefix))
+                )
+
+    commit = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True
+    ).stdout.strip()
+    return {"commit": commit, "created_at": time.time(), "results": results}
+
+
+def compare(current: dict, baseline_path: str):
+    with open(baseline_path) as file:
+        baseline = {item["scenario"]: item for item in json.load(file)["results"]}
+    for item in current["results"]:
+        before = baseline.get(item["scenario"])
+        if before is None:
+            continue
+        change = item["requests_per_second"] / before["requests_per_second"] - 1
+        print(
+            f"{item['scenario']:>8}: {change:+.1%} req/s, "
+            f"p99 {before['p99_ms']:.1f} -> {item['p99_ms']:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="In-process load test of main.app")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--output", default="load_results.json")
+    parser.add_argument("--compare", help="previous results file to compare with")
+    parser.add_argument("--skip-migrations", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_migrations:
+        command.upgrade(Config("alembic.ini"), "head")
+    report = asyncio.run(run(args))
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"results written to {args.output}")
+    if args.compare:
+        compare(report, args.compare)
@@ -0,0 +1,26 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import env_configuration  # noqa: E402
+
+# Values used when .env does not define them, matching the docker run
+# command from the README (a local postgres published on port 5434).
+LOCAL_DEFAULTS = {
+    "DBDRIVER": "postgresql",
+    "DBUSERNAME": "myusername",
+    "DBPASSWORD": "mysecretpassword",
+    "DBHOST": "localhost",
+    "DBPORT": "5434",
+    "DBNAME": "postgres",
+    "JWT_SECRET": "benchmark-secret",
+    "JWT_ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+}
+
+
+def apply():
+    for key, value in LOCAL_DEFAULTS.items():
+        env_configuration.config.setdefault(key, os.environ.get(key, value))
+    return env_configuration.config
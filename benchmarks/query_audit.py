@@ -0,0 +1,310 @@
+import argparse
+import asyncio
+import io
+import sys
+import uuid
+import local_settings
+
+local_settings.apply()
+
+import httpx  # noqa: E402
+from asyncpg import UniqueViolationError  # noqa: E402
+import sqlalchemy  # noqa: E402
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from PIL import Image  # noqa: E402
+import database_definition  # noqa: E402
+import main  # noqa: E402
+from managers import query_plans  # noqa: E402
+from models.user_cs import user_cs  # noqa: E402
+
+# Everything is generated server side; users and photos are a fraction of the
+# complaints so that each parent has many children, as in production.
+SEED = [
+    """
+    INSERT INTO users_cs (uuid, username, email, password, is_active)
+    SELECT gen_random_uuid(), :prefix || g, :prefix || g || '@example.com', 'x', true
+    FROM generate_series(1, :users) AS g
+    """,
+    """
+    INSERT INTO photos (uuid, title, description, url)
+    SELECT gen_random_uuid(), :prefix || ' photo ' || g, :prefix || ' photo ' || g,
+           'audit/' || :prefix || '/' || g
+    FROM generate_series(1, :photos) AS g
+    """,
+    """
+    WITH seeded AS (
+        SELECT array_agg(uuid) AS ids FROM photos WHERE url LIKE 'audit/' || :prefix || '/%'
+    )
+    INSERT INTO complaints (uuid, title, description, amount, photo_uuid, status, created_at)
+    SELECT gen_random_uuid(), :prefix || ' complaint ' || g, 'audit complaint ' || g,
+           round((random() * 500)::numeric, 2), seeded.ids[1 + g % cardinality(seeded.ids)],
+           (ARRAY['pending', 'approved', 'rejected'])[1 + g % 3]::state,
+           now() - g * interval '1 second'
+    FROM generate_series(1, :rows) AS g, seeded
+    """,
+    """
+    WITH seeded AS (
+        SELECT array_agg(uuid) AS ids FROM users_cs WHERE username LIKE :prefix || '%'
+    )
+    INSERT INTO users_cs_complaint (uuid, user_uuid, complaint_uuid)
+    SELECT gen_random_uuid(), seeded.ids[1 + floor(random() * cardinality(seeded.ids))::int],
+           complaints.uuid
+    FROM complaints, seeded
+    WHERE complaints.title LIKE :prefix || ' complaint %'
+    """,
+]
+CLEANUP = [
+    """
+    DELETE FROM users_cs_complaint USING users_cs
+    WHERE users_cs_complaint.user_uuid = users_cs.uuid AND users_cs.username LIKE :prefix || '%'
+    """,
+    "DELETE FROM complaints WHERE title LIKE :prefix || ' %'",
+    "DELETE FROM photos WHERE title LIKE :prefix || ' %' OR url LIKE 'audit/' || :prefix || '/%'",
+    "DELETE FROM users_cs WHERE username LIKE :prefix || '%'",
+]
+
+
+async def maintain(*tables: str):
+    # VACUUM cannot run in a transaction, so it skips databases' wrappers.
+    async with database_definition.database.connection() as connection:
+        for table in tables:
+            await connection.raw_connection.execute(f"VACUUM ANALYZE {table}")
+
+
+def bind(statement: str, **values):
+    return sqlalchemy.text(statement).bindparams(
+        **{name: value for name, value in values.items() if f":{name}" in statement}
+    )
+
+
+async def seed(prefix: str, rows: int):
+    for statement in SEED:
+        await database_definition.database.execute(
+            bind(
+                statement,
+                prefix=prefix,
+                rows=rows,
+                users=max(1, rows // 100),
+                photos=max(1, rows // 1000),
+            )
+        )
+    await maintain("users_cs", "photos", "complaints", "users_cs_complaint")
+
+
+async def cleanup(prefix: str):
+    for statement in CLEANUP:
+        await database_definition.database.execute(bind(statement, prefix=prefix))
+        # Later deletes check the emptied child tables for references.
+        await maintain("users_cs_complaint", "complaints")
+
+
+def png() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), (uuid.uuid4().int % 256, 90, 160)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+async def drive_routes(client: httpx.AsyncClient, prefix: str):
+    username = f"{prefix}x"
+    password = "audit-password"
+
+    async def call(name: str, method: str, url: str, **kwargs):
+        with query_plans.label(name):
+            response = await client.request(method, url, **kwargs)
+        if response.status_code >= 400:
+            print(f"{name}: {response.status_code} {response.text[:200]}")
+        return response
+
+    await call(
+        "POST /register/",
+        "POST",
+        "/register/",
+        json={
+            "username": username,
+            "email": f"{username}@example.com",
+            "password": password,
+        },
+    )
+    with query_plans.label("setup"):
+        await database_definition.database.execute(
+            user_cs.update()
+            .where(user_cs.c.username == username)
+            .values(is_active=True, role="approver")
+        )
+    login = await call(
+        "POST /login/",
+        "POST",
+        "/login/",
+        data={"username": username, "password": password},
+    )
+    client.headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+    await call("GET /users/me/", "GET", "/users/me/")
+    page = (await call("GET /complaints/", "GET", "/complaints/")).json()
+    await call(
+        "GET /complaints/ (page 2)",
+        "GET",
+        "/complaints/",
+        params={"cursor": page["next_cursor"]},
+    )
+    pending = (
+        await call(
+            "GET /complaints/?status",
+            "GET",
+            "/complaints/",
+            params={"status": "pending"},
+        )
+    ).json()["items"]
+    await call(
+        "GET /complaints/{uuid}/", "GET", f"/complaints/{page['items'][0]['uuid']}/"
+    )
+    await call(
+        "GET /complaints/search/",
+        "GET",
+        "/complaints/search/",
+        params={"q": f"{prefix} complaint 4242"},
+    )
+    created = (
+        await call(
+            "POST /complaints/",
+            "POST",
+            "/complaints/",
+            data={"title": f"{prefix} new", "description": "audit", "amount": "5"},
+            files={"photo": ("audit.png", png(), "image/png")},
+        )
+    ).json()
+    await call(
+        "GET /photos/{uuid}/content",
+        "GET",
+        f"/photos/{created['photo_uuid']}/content",
+    )
+    await call(
+        "POST /complaints/status/",
+        "POST",
+        "/complaints/status/",
+        json={"uuids": [item["uuid"] for item in pending[:5]], "status": "approved"},
+    )
+
+
+async def foreign_key_lookups() -> list[query_plans.RecordedQuery]:
+    lookups = []
+    for column in query_plans.foreign_key_columns(database_definition.metadata):
+        value = await database_definition.database.fetch_val(
+            sqlalchemy.select(column).limit(1)
+        )
+        if value is None:
+            continue
+        lookups.append(
+            query_plans.RecordedQuery(
+                f"lookup {column.table.name}.{column.name}",
+                "fetch_all",
+                sqlalchemy.select(*column.table.primary_key.columns).where(
+                    column == value
+                ),
+                None,
+            )
+        )
+    return lookups
+
+
+async def audit(recorded, args) -> int:
+    database = database_definition.database
+    seen = set()
+    failures = 0
+    for item in recorded:
+        if item.label == "setup":
+            continue
+        sql, query_args = await query_plans.compile_query(
+            database, item.query, item.values
+        )
+        if sql in seen:
+            continue
+        seen.add(sql)
+        shape = database_definition.query_shape(item.query)
+        try:
+            plan = await query_plans.explain(database, sql, query_args)
+        except UniqueViolationError:
+            # Recorded inserts carry keys that now exist; the planner's
+            # estimates still show how the statement would run.
+            plan = await query_plans.explain(database, sql, query_args, analyze=False)
+            print(f"\n[{item.label}] {shape}: estimated plan only")
+        except Exception as e:
+            print(f"\n[{item.label}] {shape}: not explained ({type(e).__name__}: {e})")
+            continue
+        else:
+            hit, read = query_plans.buffers(plan)
+            print(
+                f"\n[{item.label}] {shape}: {plan['Execution Time']:.2f} ms, "
+                f"buffers hit {hit} read {read}"
+            )
+        if args.verbose:
+            print(sql)
+        for finding in query_plans.plan_findings(
+            plan, args.seq_scan_min_rows, args.misestimate_factor
+        ):
+            gating = finding.kind == "seq_scan" and finding.relation not in args.allow
+            failures += gating
+            print(
+                f"  {'FAIL' if gating else 'note'} {finding.kind} "
+                f"{finding.relation or ''}: {finding.detail}"
+            )
+
+    missing = await query_plans.unindexed_foreign_keys(database)
+    print(f"\nforeign keys without an index: {len(missing)}")
+    for row in missing:
+        print(f"  FAIL {row['table_name']}({', '.join(row['columns'])})")
+    return failures + len(missing)
+
+
+async def run(args) -> int:
+    prefix = f"qa{uuid.uuid4().hex[:6]}"
+    async with main.lifespan(main.app):
+        try:
+            print(f"seeding {args.rows} complaints")
+            await seed(prefix, args.rows)
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://audit"
+            ) as client:
+                with query_plans.recording(database_definition.database) as recorded:
+                    await drive_routes(client, prefix)
+            recorded.extend(await foreign_key_lookups())
+            failures = await audit(recorded, args)
+        finally:
+            if not args.keep:
+                await cleanup(prefix)
+    print(f"\n{failures} problem(s)")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="EXPLAIN ANALYZE the queries the routers send"
+    )
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument(
+        "--seq-scan-min-rows", type=int, default=query_plans.SEQ_SCAN_MIN_ROWS
+    )
+    parser.add_argument(
+        "--misestimate-factor", type=float, default=query_plans.MISESTIMATE_FACTOR
+    )
+    parser.add_argument(
+        "--allow",
+        action="append",
+        default=[],
+        metavar="TABLE",
+        help="table whose sequential scans do not fail --check",
+    )
+    parser.add_argument(
+        "--check", action="store_true", help="exit with 1 when a problem is found"
+    )
+    parser.add_argument("--verbose", action="store_true", help="print the SQL")
+    parser.add_argument("--keep", action="store_true", help="leave the seed behind")
+    parser.add_argument("--skip-migrations", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_migrations:
+        command.upgrade(Config("alembic.ini"), "head")
+    failures = asyncio.run(run(args))
+    if args.check and failures:
+        sys.exit(1)
@@ -0,0 +1,149 @@
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+import local_settings
+
+local_settings.apply()
+
+import sqlalchemy  # noqa: E402
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+import database_definition  # noqa: E402
+from managers import complaints, search  # noqa: E402
+from models.complaint import complaint  # noqa: E402
+from models.photo import photo  # noqa: E402
+
+WORDS = (
+    "broken streetlight pothole noise garbage collection delayed water leak "
+    "parking fine refund heating outage elevator graffiti park bench sewer "
+    "smell traffic signal bus late invoice overcharge tree fallen snow road "
+    "flooding permit inspection neighbour dog barking construction dust"
+).split()
+RARE_TOKENS = 50_000
+# Rare case references are what support usually searches for; the common
+# words show the cost of ranking a large share of the table.
+TERMS = ["case4242", "case17 or case99", "pothole case123", "water leak", '"bus late"']
+
+# Random sentences are built server side so a million rows never cross the wire.
+SEED = sqlalchemy.text(
+    """
+    INSERT INTO complaints (uuid, title, description, amount, photo_uuid)
+    SELECT gen_random_uuid(),
+           left(array_to_string(ARRAY(
+               SELECT (CAST(:words AS text[]))[1 + floor(random() * :word_count)::int]
+               FROM generate_series(1, 4) WHERE g > 0), ' '), 50),
+           array_to_string(ARRAY(
+               SELECT (CAST(:words AS text[]))[1 + floor(random() * :word_count)::int]
+               FROM generate_series(1, 30) WHERE g > 0), ' ')
+           || ' case' || floor(random() * :rare_tokens)::int
+           || ' case' || floor(random() * :rare_tokens)::int,
+           round((random() * 500)::numeric, 2),
+           :photo_uuid
+    FROM generate_series(1, :rows) AS g
+    """
+)
+
+
+async def timed(query, repeat: int) -> tuple[float, int]:
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = await database_definition.database.fetch_all(query)
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies), len(rows)
+
+
+async def seed(rows: int, batch: int, photo_uuid: uuid.UUID):
+    await database_definition.database.execute(
+        photo.insert().values(
+            uuid=photo_uuid,
+            title=f"search-bench-{photo_uuid.hex[:8]}",
+            description=f"search benchmark corpus {photo_uuid}",
+            url=f"bench/{photo_uuid}",
+        )
+    )
+    start = time.perf_counter()
+    for done in range(0, rows, batch):
+        await database_definition.database.execute(
+            SEED.bindparams(
+                words=WORDS,
+                word_count=len(WORDS),
+                rare_tokens=RARE_TOKENS,
+                photo_uuid=photo_uuid,
+                rows=min(batch, rows - done),
+            )
+        )
+        print(f"seeded {min(done + batch, rows)} rows", end="\r")
+    await database_definition.database.execute("ANALYZE complaints")
+    print(f"seeded {rows} rows in {time.perf_counter() - start:.1f} s")
+
+
+async def cleanup(photo_uuid: uuid.UUID):
+    await database_definition.database.execute(
+        complaint.delete().where(complaint.c.photo_uuid == photo_uuid)
+    )
+    await database_definition.database.execute(
+        photo.delete().where(photo.c.uuid == photo_uuid)
+    )
+
+
+async def run(args):
+    photo_uuid = uuid.uuid4()
+    await database_definition.database.connect()
+    try:
+        await seed(args.rows, args.batch, photo_uuid)
+        print(
+            f"{'terms':>18} {'hits':>6} {'fts ms':>8} {'page 2':>8} "
+            f"{'cached':>8} {'ilike ms':>9}"
+        )
+        for terms in TERMS:
+            fts, hits = await timed(
+                search.build_query(terms, None, None, args.limit), args.repeat
+            )
+            first = await search.search_complaints(terms, None, None, args.limit)
+            page_two = 0.0
+            if first["next_cursor"] is not None:
+                page_two, _ = await timed(
+                    search.build_query(terms, None, first["next_cursor"], args.limit),
+                    args.repeat,
+                )
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                await search.search_complaints(terms, None, None, args.limit)
+            cached = (time.perf_counter() - start) / args.repeat
+            word = terms.strip('"-').split()[0]
+            ilike, _ = await timed(
+                sqlalchemy.select(*complaints.OUT_COLUMNS)
+                .where(
+                    complaint.c.title.ilike(f"%{word}%")
+                    | complaint.c.description.ilike(f"%{word}%")
+                )
+                .order_by(complaint.c.created_at.desc())
+                .limit(args.limit),
+                args.repeat,
+            )
+            print(
+                f"{terms:>18} {hits:>6} {fts * 1000:8.2f} {page_two * 1000:8.2f} "
+                f"{cached * 1000:8.3f} {ilike * 1000:9.2f}"
+            )
+    finally:
+        if not args.keep:
+            await cleanup(photo_uuid)
+        await database_definition.database.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Complaint full-text search")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="leave the corpus behind")
+    parser.add_argument("--skip-migrations", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_migrations:
+        command.upgrade(Config("alembic.ini"), "head")
+    asyncio.run(run(args))
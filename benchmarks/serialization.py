@@ -0,0 +1,70 @@
+import asyncio
+import datetime
+import os
+import time
+import uuid
+import local_settings
+
+local_settings.apply()
+
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+from managers import serialization  # noqa: E402
+from models.enums_for_models import RoleType  # noqa: E402
+from schemas.general import UsersSchema  # noqa: E402
+
+SIZES = [int(size) for size in os.environ.get("SIZES", "1000,10000,100000").split(",")]
+FIELD = create_response_field(name="users", type_=list[UsersSchema.UserSignOut])
+
+
+def make_rows(size: int) -> list[dict]:
+    now = datetime.datetime.now()
+    return [
+        {
+            "uuid": uuid.uuid4(),
+            "username": f"user{index}",
+            "email": f"user{index}@example.com",
+            "password": "$2b$12$" + "x" * 53,
+            "role": RoleType.user,
+            "is_active": True,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for index in range(size)
+    ]
+
+
+async def fastapi_default(rows):
+    content = await serialize_response(
+        field=FIELD, response_content=rows, is_coroutine=True
+    )
+    return JSONResponse(content).body
+
+
+async def orjson_response(rows):
+    content = await serialize_response(
+        field=FIELD, response_content=rows, is_coroutine=True
+    )
+    return ORJSONResponse(content).body
+
+
+async def orjson_direct(rows):
+    return ORJSONResponse(serialization.rows_as(UsersSchema.UserSignOut, rows)).body
+
+
+async def main():
+    print(f"{'rows':>8} {'path':>16} {'seconds':>9} {'MB':>7}")
+    for size in SIZES:
+        rows = make_rows(size)
+        for path in (fastapi_default, orjson_response, orjson_direct):
+            start = time.perf_counter()
+            body = await path(rows)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{size:>8} {path.__name__:>16} {elapsed:>9.4f} {len(body) / 1e6:>7.2f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
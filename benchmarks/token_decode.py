@@ -0,0 +1,36 @@
+import os
+import timeit
+from datetime import timedelta
+import local_settings
+
+config = local_settings.apply()
+
+from jose import jwt  # noqa: E402
+from managers import authentication, authorization  # noqa: E402
+
+ROUNDS = int(os.environ.get("ROUNDS", 20000))
+
+
+def uncached(token):
+    jwt.decode(
+        token,
+        config.get("JWT_SECRET"),
+        algorithms=[config.get("JWT_ALGORITHM")],
+    )
+
+
+def cached(token):
+    authorization.decode_token(token)
+
+
+if __name__ == "__main__":
+    token = authentication.create_access_token(
+        {"sub": "benchmark"}, expires_delta=timedelta(minutes=30)
+    )
+    print(f"algorithm={config.get('JWT_ALGORITHM')} rounds={ROUNDS}")
+    for name, func in (("uncached", uncached), ("cached", cached)):
+        elapsed = timeit.timeit(lambda: func(token), number=ROUNDS)
+        print(
+            f"{name:>9}: {ROUNDS / elapsed:12.0f} decodes/s {elapsed / ROUNDS * 1e6:8.2f} us/op"
+        )
+    print(f"token cache: {authorization.token_cache.stats()}")
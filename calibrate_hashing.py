@@ -0,0 +1,26 @@
+import argparse
+from managers import hashing
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Pick the bcrypt cost that fits a per-hash latency budget"
+    )
+    parser.add_argument("--budget-ms", type=float, default=hashing.HASH_BUDGET_MS)
+    parser.add_argument("--samples", type=int, default=3)
+    args = parser.parse_args()
+
+    rounds, timings = hashing.calibrate(args.budget_ms / 1000, args.samples)
+    print(f"{'cost':>4} {'ms/hash':>9} {'logins/s':>9}")
+    for cost, seconds in timings.items():
+        marker = " <" if cost == rounds else ""
+        # Throughput assumes every hashing worker is busy.
+        print(
+            f"{cost:>4} {seconds * 1000:9.1f} {hashing.HASH_WORKERS / seconds:9.1f}"
+            f"{marker}"
+        )
+    print(f"\nBCRYPT_ROUNDS={rounds}  # budget {args.budget_ms:g} ms")
+    if rounds != hashing.BCRYPT_ROUNDS:
+        print(
+            f"currently {hashing.BCRYPT_ROUNDS}; stored hashes move to the new cost "
+            "as their users log in"
+        )
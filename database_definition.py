@@ -1,6 +1,12 @@
+import asyncio
+import contextlib
+import contextvars
+import itertools
+import time
 import env_configuration
 import databases
 import sqlalchemy
+from managers import metrics
 
 DATABASE_URL = "%s://%s:%s@%s:%s/%s" % (
     env_configuration.config.get("DBDRIVER"),
@@ -11,8 +17,257 @@ DATABASE_URL = "%s://%s:%s@%s:%s/%s" % (
     env_configuration.config.get("DBNAME"),
 )
 
-database = databases.Database(DATABASE_URL)
-metadata = sqlalchemy.MetaData()
+# asyncpg has no absolute connection lifetime: connections are recycled after
+# DB_POOL_MAX_QUERIES queries or DB_POOL_MAX_LIFETIME seconds of idleness.
+POOL_OPTIONS = {
+    "min_size": int(env_configuration.config.get("DB_POOL_MIN_SIZE", 5)),
+    "max_size": int(env_configuration.config.get("DB_POOL_MAX_SIZE", 20)),
+    "max_queries": int(env_configuration.config.get("DB_POOL_MAX_QUERIES", 50000)),
+    "max_inactive_connection_lifetime": float(
+        env_configuration.config.get("DB_POOL_MAX_LIFETIME", 300)
+    ),
+    "statement_cache_size": int(
+        env_configuration.config.get("DB_STATEMENT_CACHE_SIZE", 100)
+    ),
+}
+POOL_ACQUIRE_TIMEOUT = float(
+    env_configuration.config.get("DB_POOL_ACQUIRE_TIMEOUT", 10)
+)
+
+REPLICA_URLS = [
+    url.strip()
+    for url in env_configuration.config.get("DBREPLICA_URLS", "").split(",")
+    if url.strip()
+]
+
+# Debug only: adds x-db-queries, the statements a request sent before its
+# response started, to every response.
+QUERY_COUNT_HEADER = (
+    env_configuration.config.get("DB_QUERY_COUNT_HEADER", "false").lower() == "true"
+)
+
+use_primary = contextvars.ContextVar("use_primary", default=False)
+query_counter = contextvars.ContextVar("query_counter", default=None)
+
+
+acquire_wait_seconds = metrics.Histogram(
+    "db_pool_acquire_wait_seconds", "Time spent waiting for a pooled connection"
+)
+acquire_timeouts = metrics.Counter(
+    "db_pool_acquire_timeouts_total", "Connection acquires that timed out"
+)
+
+
+def query_shape(query) -> str:
+    # A bounded label such as "select users_cs" instead of the full SQL text.
+    if isinstance(query, str):
+        return query.split(None, 1)[0].lower() if query.strip() else "unknown"
+    kind = getattr(query, "__visit_name__", "unknown")
+    table = getattr(query, "table", None)
+    if table is not None:
+        return f"{kind} {getattr(table, 'name', table)}"
+    froms = getattr(query, "get_final_froms", lambda: [])()
+    names = sorted({getattr(item, "name", None) or "subquery" for item in froms})
+    return " ".join([kind, *names])
+
+
+def is_read_only(query) -> bool:
+    if isinstance(query, str):
+        return query.lstrip()[:6].lower() == "select"
+    return bool(getattr(query, "is_select", False)) and (
+        getattr(query, "_for_update_arg", None) is None
+    )
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+
+@contextlib.contextmanager
+def counting_queries():
+    # Tasks started inside the block share the counter with it.
+    counter = QueryCounter()
+    token = query_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        query_counter.reset(token)
+
+
+def count_query():
+    counter = query_counter.get()
+    if counter is not None:
+        counter.count += 1
+
+
+class QueryCountMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with counting_queries() as counter:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"x-db-queries", str(counter.count).encode()),
+                    ]
+                await send(message)
 
-engine = sqlalchemy.create_engine(DATABASE_URL)
-metadata.create_all(engine)
+            await self.app(scope, receive, send_wrapper)
+
+
+class MonitoredPool:
+    def __init__(self, pool, acquire_timeout: float):
+        self._pool = pool
+        self.acquire_timeout = acquire_timeout
+        self.waiting = 0
+        self.acquire_timeouts = 0
+
+    async def acquire(self):
+        self.waiting += 1
+        start = time.perf_counter()
+        try:
+            return await self._pool.acquire(timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.acquire_timeouts += 1
+            acquire_timeouts.inc()
+            raise
+        finally:
+            self.waiting -= 1
+            acquire_wait_seconds.observe(time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+    def stats(self) -> dict:
+        size = self._pool.get_size()
+        idle = self._pool.get_idle_size()
+        return {
+            "min_size": self._pool.get_min_size(),
+            "max_size": self._pool.get_max_size(),
+            "size": size,
+            "in_use": size - idle,
+            "idle": idle,
+            "waiting": self.waiting,
+            "acquire_timeouts": self.acquire_timeouts,
+            "acquire_wait_seconds": acquire_wait_seconds.snapshot(),
+        }
+
+
+class Database(databases.Database):
+    def __init__(self, url, replica_urls=(), **options):
+        super().__init__(url, **options)
+        self.replicas = [
+            Database(replica_url, **options) for replica_url in replica_urls
+        ]
+        self._replica_cycle = itertools.cycle(self.replicas)
+
+    async def connect(self) -> None:
+        await super().connect()
+        # databases does not expose the asyncpg pool, so it is wrapped in place
+        # to enforce the acquire timeout and record how long requests wait.
+        self._backend._pool = MonitoredPool(self._backend._pool, POOL_ACQUIRE_TIMEOUT)
+        for replica in self.replicas:
+            await replica.connect()
+
+    async def disconnect(self) -> None:
+        for replica in self.replicas:
+            await replica.disconnect()
+        await super().disconnect()
+
+    def pool_stats(self) -> dict:
+        pool = getattr(self._backend, "_pool", None)
+        if not isinstance(pool, MonitoredPool):
+            return {"connected": False}
+        stats = {"connected": True, **pool.stats()}
+        if self.replicas:
+            stats["replicas"] = [replica.pool_stats() for replica in self.replicas]
+        return stats
+
+    @contextlib.contextmanager
+    def primary(self):
+        # Read-your-writes: reads inside this block, and in tasks started from
+        # it, go to the primary even when replicas are configured.
+        token = use_primary.set(True)
+        try:
+            yield self
+        finally:
+            use_primary.reset(token)
+
+    def reader_for(self, query) -> "Database":
+        if (
+            not self.replicas
+            or use_primary.get()
+            or not is_read_only(query)
+            # databases keeps the open transactions of the current task here
+            or self.connection()._transaction_stack
+        ):
+            return self
+        return next(self._replica_cycle)
+
+    async def fetch_all(self, query, values=None):
+        count_query()
+        target = self.reader_for(query)
+        with metrics.db_query_seconds.time(
+            method="fetch_all", shape=query_shape(query)
+        ):
+            return await databases.Database.fetch_all(target, query, values)
+
+    async def fetch_one(self, query, values=None):
+        count_query()
+        target = self.reader_for(query)
+        with metrics.db_query_seconds.time(
+            method="fetch_one", shape=query_shape(query)
+        ):
+            return await databases.Database.fetch_one(target, query, values)
+
+    async def fetch_val(self, query, values=None, column=0):
+        count_query()
+        target = self.reader_for(query)
+        with metrics.db_query_seconds.time(
+            method="fetch_val", shape=query_shape(query)
+        ):
+            return await databases.Database.fetch_val(target, query, values, column)
+
+    async def execute(self, query, values=None):
+        count_query()
+        with metrics.db_query_seconds.time(method="execute", shape=query_shape(query)):
+            return await super().execute(query, values)
+
+    async def execute_many(self, query, values):
+        count_query()
+        with metrics.db_query_seconds.time(
+            method="execute_many", shape=query_shape(query)
+        ):
+            return await super().execute_many(query, values)
+
+    async def iterate(self, query, values=None):
+        count_query()
+        target = self.reader_for(query)
+        with metrics.db_query_seconds.time(method="iterate", shape=query_shape(query)):
+            async for record in databases.Database.iterate(target, query, values):
+                yield record
+
+
+database = Database(DATABASE_URL, REPLICA_URLS, **POOL_OPTIONS)
+
+metrics.CallbackGauge(
+    "db_pool_connections",
+    "Pooled connections by state",
+    lambda: {
+        (state,): database.pool_stats().get(state, 0)
+        for state in ("in_use", "idle", "waiting")
+    },
+    ("state",),
+)
+
+# The schema is managed by Alembic (alembic upgrade head), so importing the
+# app never opens a connection.
+metadata = sqlalchemy.MetaData()
@@ -1,7 +1,10 @@
+import json
 import databases
 import sqlalchemy
 from decouple import config
 from fastapi import FastAPI, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 
 DATABASE_URL = f"postgresql://{config('DB_USER')}:{config('DB_PASSWORD')}@{config('DB_HOST')}:{config('DB_PORT')}/{config('DB_NAME')}"
 
@@ -45,6 +48,23 @@ metadata.create_all(engine)
 
 app = FastAPI()
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+async def iterate_ndjson(query):
+    async for row in database.iterate(query):
+        yield json.dumps(jsonable_encoder(dict(row._mapping))).encode() + b"\n"
+
+
+async def fetch_rows(request: Request, query):
+    if wants_ndjson(request):
+        return StreamingResponse(iterate_ndjson(query), media_type=NDJSON_MEDIA_TYPE)
+    return await database.fetch_all(query)
+
 
 @app.on_event("startup")
 async def startup():
@@ -57,9 +77,9 @@ async def shutdown():
 
 
 @app.get("/books/")
-async def get_all_books():
+async def get_all_books(request: Request):
     query = books.select()
-    return await database.fetch_all(query)
+    return await fetch_rows(request, query)
 
 
 @app.post("/books/")
@@ -71,9 +91,9 @@ async def create_book(request: Request):
 
 
 @app.get("/readers/")
-async def get_all_readers():
+async def get_all_readers(request: Request):
     query = readers.select()
-    return await database.fetch_all(query)
+    return await fetch_rows(request, query)
 
 
 @app.post("/readers/")
@@ -85,9 +105,9 @@ async def create_reader(request: Request):
 
 
 @app.get("/read/")
-async def get_relation():
+async def get_relation(request: Request):
     query = readers_books.select()
-    return await database.fetch_all(query)
+    return await fetch_rows(request, query)
 
 
 @app.post("/read/")
@@ -0,0 +1,52 @@
+import json
+from fastapi.testclient import TestClient
+import main
+
+NDJSON = {"Accept": main.NDJSON_MEDIA_TYPE}
+
+
+class Row:
+    def __init__(self, **values):
+        self._mapping = values
+
+
+def fake_rows(monkeypatch, rows):
+    async def iterate(query, values=None):
+        for row in rows:
+            yield row
+
+    async def fetch_all(query, values=None):
+        return [row._mapping for row in rows]
+
+    monkeypatch.setattr(main.database, "iterate", iterate)
+    monkeypatch.setattr(main.database, "fetch_all", fetch_all)
+
+
+def test_ndjson_is_one_object_per_line(monkeypatch):
+    fake_rows(
+        monkeypatch,
+        [
+            Row(id=1, first_name="Ada", last_name="King"),
+            Row(id=2, first_name="Alan", last_name="Turing"),
+        ],
+    )
+    response = TestClient(main.app).get("/readers/", headers=NDJSON)
+    assert response.headers["content-type"] == main.NDJSON_MEDIA_TYPE
+    assert response.text.endswith("\n")
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {"id": 1, "first_name": "Ada", "last_name": "King"},
+        {"id": 2, "first_name": "Alan", "last_name": "Turing"},
+    ]
+
+
+def test_json_array_without_ndjson_accept(monkeypatch):
+    fake_rows(
+        monkeypatch, [Row(id=1, title="Dune", author="Herbert", pages=412, reader_id=1)]
+    )
+    response = TestClient(main.app).get(
+        "/books/", headers={"Accept": "application/json"}
+    )
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == [
+        {"id": 1, "title": "Dune", "author": "Herbert", "pages": 412, "reader_id": 1}
+    ]
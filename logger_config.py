@@ -1,10 +1,108 @@
+import atexit
+import contextvars
+import copy
 import logging
+import logging.handlers
+import queue
+import uuid
+import orjson
+import env_configuration
 
-logging.basicConfig(
-    encoding="utf-8",
-    format="%(levelname)7s:%(asctime)s %(message)s",
-    datefmt="%m/%d/%Y %I:%M:%S %p",
-    level=logging.WARNING,
-    force=True,
-)
+LOG_LEVEL = env_configuration.config.get("LOG_LEVEL", "WARNING").upper()
+LOG_FORMAT = env_configuration.config.get("LOG_FORMAT", "text")
+LOG_QUEUE = env_configuration.config.get("LOG_QUEUE", "true").lower() == "true"
+
+request_id = contextvars.ContextVar("request_id", default="-")
+
+
+class RequestIdFilter(logging.Filter):
+    # Runs in the calling thread, where the request context is still set.
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry).decode()
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    # The stock handler formats the whole record on the caller's thread; only
+    # the message is resolved here, tracebacks and layout are left to the
+    # listener thread.
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+if LOG_FORMAT == "json":
+    formatter = JsonFormatter(datefmt="%Y-%m-%dT%H:%M:%S%z")
+else:
+    formatter = logging.Formatter(
+        "%(levelname)7s:%(asctime)s [%(request_id)s] %(message)s",
+        datefmt="%m/%d/%Y %I:%M:%S %p",
+    )
+
+stream_handler = logging.StreamHandler()
+stream_handler.setFormatter(formatter)
+listener = None
+
+if LOG_QUEUE:
+    log_queue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+else:
+    handler = stream_handler
+
+
+def restart_listener():
+    # fork() copies the queue into a worker but not the thread draining it.
+    if listener is not None:
+        listener._thread = None
+        listener.start()
+
+
+handler.addFilter(RequestIdFilter())
+logging.basicConfig(level=LOG_LEVEL, handlers=[handler], force=True)
 logger = logging.getLogger()
+
+
+class RequestIdMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        value = headers.get(b"x-request-id", b"").decode("latin-1")[:64]
+        token = request_id.set(value or uuid.uuid4().hex)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = [
+                    *message["headers"],
+                    (b"x-request-id", request_id.get().encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id.reset(token)
@@ -1,17 +1,36 @@
 from information import information
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 from resources.routes import api_router
 import database_definition
+from managers import (  # noqa: F401
+    hashing,
+    idempotency,
+    jobs,
+    metrics,
+    notifications,
+    thumbnails,
+)
+from logger_config import RequestIdMiddleware
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await database_definition.database.connect()
+    jobs.runner.start()
     yield
+    await jobs.runner.stop()
     await database_definition.database.disconnect()
+    hashing.shutdown_executor()
+    thumbnails.shutdown_executor()
 
 
 information.update({"lifespan": lifespan})
-app = FastAPI(**information)
+app = FastAPI(**information, default_response_class=ORJSONResponse)
 app.include_router(api_router)
+app.add_middleware(idempotency.IdempotencyMiddleware)
+if database_definition.QUERY_COUNT_HEADER:
+    app.add_middleware(database_definition.QueryCountMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(RequestIdMiddleware)
@@ -1,34 +1,101 @@
-from passlib.context import CryptContext
+import asyncio
+import time
 import env_configuration
 from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException, status
 from jose import jwt
+import sqlalchemy
 from schemas.general import TokenSchema
-from models import user_cs
+from models.user_cs import user_cs
 import database_definition
+from logger_config import logger
+from managers import authorization, hashing
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+HASH_POPULATION_INTERVAL = float(
+    env_configuration.config.get("HASH_POPULATION_INTERVAL", 60)
+)
 
+_rehashes: set[asyncio.Task] = set()
+_population_counts: set[asyncio.Task] = set()
+_population_refreshed_at = float("-inf")
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+
+async def rehash_password(username: str, old_hash: str, password: str):
+    try:
+        new_hash = await hashing.run_hashing(
+            hashing.get_password_hash, password, operation="rehash"
+        )
+        # Only the hash that was just verified is replaced, so a password
+        # change racing with this login wins.
+        updated = await database_definition.database.fetch_val(
+            user_cs.update()
+            .where(user_cs.c.username == username, user_cs.c.password == old_hash)
+            .values(password=new_hash)
+            .returning(user_cs.c.uuid)
+        )
+    except Exception as e:
+        logger.warning("Something was wrong while rehashing a password: %s", e)
+        hashing.rehashes.inc(outcome="failed")
+        return
+    if updated is None:
+        hashing.rehashes.inc(outcome="skipped")
+        return
+    authorization.invalidate_user(username)
+    hashing.rehashes.inc(outcome="updated")
+
+
+def schedule_rehash(username: str, old_hash: str, password: str):
+    # The plain password must never reach the jobs table, so this stays an
+    # in-process task; if it is lost the next login schedules it again.
+    task = asyncio.create_task(rehash_password(username, old_hash, password))
+    _rehashes.add(task)
+    task.add_done_callback(_rehashes.discard)
 
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def count_hash_population():
+    cost = sqlalchemy.func.substr(user_cs.c.password, 5, 2)
+    try:
+        rows = await database_definition.database.fetch_all(
+            sqlalchemy.select(
+                cost.label("cost"), sqlalchemy.func.count().label("users")
+            ).group_by(cost)
+        )
+    except Exception as e:
+        logger.warning("Something was wrong while counting password hashes: %s", e)
+        return
+    hashing.hash_population.reset()
+    for row in rows:
+        hashing.hash_population.set(row["users"], cost=int(row["cost"]))
+
+
+def refresh_hash_population():
+    # The count scans users_cs, so a scrape never waits for it: it starts at
+    # most once per interval in the background and scrapes report the last
+    # finished count.
+    global _population_refreshed_at
+    if time.monotonic() - _population_refreshed_at < HASH_POPULATION_INTERVAL:
+        return
+    _population_refreshed_at = time.monotonic()
+    task = asyncio.create_task(count_hash_population())
+    _population_counts.add(task)
+    task.add_done_callback(_population_counts.discard)
 
 
 async def authenticate_user(username: str, password: str):
     current_user = await database_definition.database.fetch_one(
         user_cs.select().where(user_cs.c.username == username)
     )
-    user_dict = dict(current_user)
-    if not user_dict:
+    if current_user is None:
         return False
+    user_dict = dict(current_user)
     if not user_dict.get("is_active"):
         return False
-    if not verify_password(password, user_dict.get("password")):
+    hashed_password = user_dict.get("password")
+    if not await hashing.check_password(password, hashed_password):
         return False
+    hashing.hash_logins.inc(cost=hashing.hash_cost(hashed_password))
+    if hashing.needs_update(hashed_password):
+        schedule_rehash(username, hashed_password, password)
     return user_dict
 
 
@@ -1,36 +1,88 @@
 from fastapi.security import OAuth2PasswordBearer
-from fastapi import HTTPException, Depends, status
+from fastapi import HTTPException, Depends, Request, status
 from typing import Annotated
+import hashlib
+import hmac
+import time
 import env_configuration
 from jose import JWTError, jwt
 import database_definition
 from schemas.general import UsersSchema
-from models import user_cs
+from models.user_cs import user_cs
+from models.enums_for_models import RoleType
+from managers import metrics
+from managers.cache import make_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+METRICS_TOKEN = env_configuration.config.get("METRICS_TOKEN", "")
+
+user_cache = make_cache(
+    maxsize=int(env_configuration.config.get("USER_CACHE_SIZE", 1024)),
+    ttl=float(env_configuration.config.get("USER_CACHE_TTL", 60)),
+)
+
+token_cache = make_cache(
+    maxsize=int(env_configuration.config.get("TOKEN_CACHE_SIZE", 4096)),
+    ttl=float(env_configuration.config.get("TOKEN_CACHE_TTL", 900)),
+)
+
+metrics.CallbackGauge(
+    "auth_cache_lookups",
+    "Authentication cache hits and misses",
+    lambda: {
+        (name, outcome): getattr(cache, outcome)
+        for name, cache in (("user", user_cache), ("token", token_cache))
+        for outcome in ("hits", "misses")
+    },
+    ("cache", "outcome"),
+)
+
+
+def decode_token(token: str) -> dict:
+    digest = hashlib.sha256(token.encode()).hexdigest()
+    payload = token_cache.get(digest)
+    if payload is not None:
+        if payload.get("exp", 0) <= time.time():
+            raise JWTError("Signature has expired.")
+        return payload
+    payload = jwt.decode(
+        token,
+        env_configuration.config.get("JWT_SECRET"),
+        algorithms=[env_configuration.config.get("JWT_ALGORITHM")],
+    )
+    if "exp" in payload:
+        token_cache.set(digest, payload, ttl=payload["exp"] - time.time())
+    return payload
+
+
+def invalidate_user(username: str):
+    user_cache.invalidate(username)
 
 
 async def get_user(username: str):
+    user = user_cache.get(username)
+    if user is not None:
+        return user
     current_user = await database_definition.database.fetch_one(
         user_cs.select().where(user_cs.c.username == username)
     )
-    return dict(current_user)
+    if current_user is None:
+        return None
+    user = dict(current_user)
+    user_cache.set(username, user)
+    return user
 
 
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)]
-) -> UsersSchema.BaseUsers:
+) -> UsersSchema.CurrentUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(
-            token,
-            env_configuration.config.get("JWT_SECRET"),
-            algorithms=[env_configuration.config.get("JWT_ALGORITHM")],
-        )
+        payload = decode_token(token)
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
@@ -40,22 +92,48 @@ async def get_current_user(
     user = await get_user(username)
     if user is None:
         raise credentials_exception
-    return UsersSchema.BaseUsers(**user)
+    return UsersSchema.CurrentUser(**user)
 
 
 async def get_current_active_user(
-    current_user: Annotated[UsersSchema.BaseUsers, Depends(get_current_user)],
-) -> UsersSchema.BaseUsers:
-    if not current_user.get("is_active"):
+    current_user: Annotated[UsersSchema.CurrentUser, Depends(get_current_user)],
+) -> UsersSchema.CurrentUser:
+    if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 
 async def get_current_active_admin(
-    current_user: Annotated[UsersSchema.BaseUsers, Depends(get_current_user)],
-) -> UsersSchema.BaseUsers:
-    if current_user.get("role").value != "admin":
+    current_user: Annotated[UsersSchema.CurrentUser, Depends(get_current_user)],
+) -> UsersSchema.CurrentUser:
+    if current_user.role.value != "admin":
         raise HTTPException(
             status_code=400, detail="You do not have permission for this action"
         )
     return current_user
+
+
+async def get_current_active_approver(
+    current_user: Annotated[UsersSchema.CurrentUser, Depends(get_current_active_user)],
+) -> UsersSchema.CurrentUser:
+    if current_user.role not in (RoleType.approver, RoleType.admin):
+        raise HTTPException(
+            status_code=400, detail="You do not have permission for this action"
+        )
+    return current_user
+
+
+async def verify_metrics_token(request: Request):
+    # Scrapers send a static bearer token rather than a user JWT; without a
+    # configured token the endpoint does not exist.
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        token.encode(), METRICS_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
@@ -0,0 +1,178 @@
+import hashlib
+import mmap
+import multiprocessing
+import pickle
+import struct
+import time
+from collections import OrderedDict
+from threading import Lock
+import env_configuration
+
+# "shared" keeps entries in memory mapped before the launcher forks, so every
+# worker reads and invalidates the same entries.
+CACHE_BACKEND = env_configuration.config.get("CACHE_BACKEND", "local")
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= self.timer():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float | None = None):
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, self.timer() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SharedTTLCache:
+    # Fixed size slots in an anonymous MAP_SHARED mapping, grouped into small
+    # buckets by key hash. A full bucket drops the entry closest to expiry.
+    HEADER = struct.Struct("16sdI")
+    WAYS = 4
+
+    def __init__(
+        self, maxsize: int, ttl: float, slot_size: int = 1024, timer=time.monotonic
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.slot_size = slot_size
+        self.timer = timer
+        self.hits = 0
+        self.misses = 0
+        self.buckets = max(1, -(-maxsize // self.WAYS))
+        self._memory = mmap.mmap(-1, self.buckets * self.WAYS * slot_size)
+        self._lock = multiprocessing.Lock()
+
+    def _locate(self, key) -> tuple[bytes, int]:
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=16).digest()
+        bucket = int.from_bytes(digest[:8], "little") % self.buckets
+        return digest, bucket * self.WAYS * self.slot_size
+
+    def _slots(self, start: int):
+        for way in range(self.WAYS):
+            offset = start + way * self.slot_size
+            yield offset, self.HEADER.unpack_from(self._memory, offset)
+
+    def get(self, key, default=None):
+        digest, start = self._locate(key)
+        payload = None
+        with self._lock:
+            for offset, (slot_digest, expires_at, length) in self._slots(start):
+                if slot_digest != digest:
+                    continue
+                if expires_at <= self.timer():
+                    self.HEADER.pack_into(self._memory, offset, bytes(16), 0.0, 0)
+                    break
+                body = offset + self.HEADER.size
+                payload = self._memory[body : body + length]
+                break
+        if payload is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return pickle.loads(payload)
+
+    def set(self, key, value, ttl: float | None = None):
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.slot_size - self.HEADER.size:
+            return
+        digest, start = self._locate(key)
+        with self._lock:
+            now = self.timer()
+            target = None
+            for offset, (slot_digest, expires_at, _) in self._slots(start):
+                if slot_digest == digest or expires_at <= now:
+                    target = offset
+                    break
+                if target is None or expires_at < target_expires_at:
+                    target, target_expires_at = offset, expires_at
+            self.HEADER.pack_into(self._memory, target, digest, now + ttl, len(payload))
+            body = target + self.HEADER.size
+            self._memory[body : body + len(payload)] = payload
+
+    def invalidate(self, key):
+        digest, start = self._locate(key)
+        with self._lock:
+            for offset, (slot_digest, _, _) in self._slots(start):
+                if slot_digest == digest:
+                    self.HEADER.pack_into(self._memory, offset, bytes(16), 0.0, 0)
+
+    def clear(self):
+        with self._lock:
+            self._memory[:] = bytes(len(self._memory))
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def __len__(self):
+        now = self.timer()
+        return sum(
+            1
+            for bucket in range(self.buckets)
+            for _, (_, expires_at, _) in self._slots(
+                bucket * self.WAYS * self.slot_size
+            )
+            if expires_at > now
+        )
+
+
+def make_cache(maxsize: int, ttl: float):
+    if CACHE_BACKEND == "shared":
+        return SharedTTLCache(maxsize, ttl)
+    return TTLCache(maxsize, ttl)
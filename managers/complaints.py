@@ -0,0 +1,155 @@
+import functools
+import uuid
+import sqlalchemy
+from sqlalchemy.dialects import postgresql
+import database_definition
+from managers import jobs, uploads
+from models.complaint import complaint
+from models.job import job
+from models.photo import photo
+from models.user_cs_complaint import user_cs_complaint
+from schemas.general import ComplaintsSchema
+
+# The complaint columns every read and write returns, as ComplaintOut orders them.
+OUT_COLUMN_NAMES = tuple(ComplaintsSchema.ComplaintOut.model_fields)
+OUT_COLUMNS = [complaint.c[name] for name in OUT_COLUMN_NAMES]
+
+COMPLAINT_VALUES = ("title", "description", "amount")
+PHOTO_VALUES = ("title", "description", "url")
+PHOTO_TAG_LENGTH = 12
+
+
+def photo_values(
+    complaint_in: ComplaintsSchema.ComplaintIn, image: uploads.StoredImage
+) -> dict:
+    # photos.title and photos.description are unique on their own, but the
+    # insert only skips a photo whose content (url) is already stored. Values
+    # defaulted from the complaint get the start of the content digest, so
+    # two complaints with the same text and different images do not collide.
+    tag = f" ({image.digest[:PHOTO_TAG_LENGTH]})"
+    title_length = photo.c.title.type.length - len(tag)
+    return {
+        "title": complaint_in.photo_title or complaint_in.title[:title_length] + tag,
+        "description": complaint_in.photo_description or complaint_in.description + tag,
+        "url": image.key,
+    }
+
+
+def uuid_param(name: str):
+    # An explicit CAST instead of the dialect's "::UUID" suffix, which the
+    # named-parameter parser of the compiled text would read as part of the name.
+    return sqlalchemy.cast(sqlalchemy.bindparam(name), sqlalchemy.Uuid)
+
+
+def create_statement():
+    # One statement writes the photo (or reuses the row stored for the same
+    # content), the complaint, the user link and the thumbnail job.
+    # Postgres runs every data-modifying CTE once, inside the statement's own
+    # transaction, so there is no BEGIN/COMMIT round trip either.
+    new_photo = (
+        postgresql.insert(photo)
+        .values(
+            uuid=uuid_param("photo_uuid"),
+            **{name: sqlalchemy.bindparam(f"photo_{name}") for name in PHOTO_VALUES},
+        )
+        # DO UPDATE instead of DO NOTHING: when a concurrent request stores
+        # the same content first, this insert waits for it and then returns
+        # its row, which a lookup using this statement's snapshot would miss.
+        .on_conflict_do_update(
+            index_elements=[photo.c.url], set_={"url": sqlalchemy.text("excluded.url")}
+        )
+        .returning(
+            photo.c.uuid,
+            photo.c.url,
+            # xmax is only 0 on a row this statement inserted.
+            sqlalchemy.literal_column("xmax = 0", sqlalchemy.Boolean).label("inserted"),
+        )
+        .cte("new_photo")
+    )
+    photo_uuid = sqlalchemy.select(new_photo.c.uuid).scalar_subquery()
+    new_complaint = (
+        complaint.insert()
+        .values(
+            uuid=uuid_param("complaint_uuid"),
+            photo_uuid=photo_uuid,
+            **{name: sqlalchemy.bindparam(name) for name in COMPLAINT_VALUES},
+        )
+        .returning(*OUT_COLUMNS)
+        .cte("new_complaint")
+    )
+    new_link = (
+        user_cs_complaint.insert()
+        .from_select(
+            ["uuid", "user_uuid", "complaint_uuid"],
+            sqlalchemy.select(
+                uuid_param("link_uuid"),
+                uuid_param("user_uuid"),
+                new_complaint.c.uuid,
+            ),
+        )
+        .returning(user_cs_complaint.c.complaint_uuid)
+        .cte("new_link")
+    )
+    new_job = (
+        job.insert()
+        .from_select(
+            ["kind", "payload", "max_attempts"],
+            sqlalchemy.select(
+                sqlalchemy.cast(sqlalchemy.bindparam("job_kind"), sqlalchemy.String),
+                sqlalchemy.func.jsonb_build_object(
+                    sqlalchemy.cast(sqlalchemy.bindparam("job_key"), sqlalchemy.Text),
+                    new_photo.c.url,
+                ),
+                sqlalchemy.cast(
+                    sqlalchemy.bindparam("job_max_attempts"), sqlalchemy.Integer
+                ),
+            ).where(new_photo.c.inserted),
+        )
+        .returning(job.c.id)
+        .cte("new_job")
+    )
+    thumbnail_jobs = (
+        sqlalchemy.select(sqlalchemy.func.count())
+        .select_from(new_job)
+        .scalar_subquery()
+    )
+    return sqlalchemy.select(
+        *(new_complaint.c[name] for name in OUT_COLUMN_NAMES),
+        thumbnail_jobs.label("thumbnail_jobs"),
+    ).select_from(
+        new_complaint.join(new_link, new_link.c.complaint_uuid == new_complaint.c.uuid)
+    )
+
+
+@functools.cache
+def create_sql() -> str:
+    # Building and compiling the statement costs more than running it, so it
+    # is done once; each call only binds values.
+    return str(
+        create_statement().compile(dialect=postgresql.dialect(paramstyle="named"))
+    )
+
+
+def create_values(user_uuid: uuid.UUID, values: dict, photo_values: dict) -> dict:
+    return {
+        "photo_uuid": uuid.uuid4(),
+        "complaint_uuid": uuid.uuid4(),
+        "link_uuid": uuid.uuid4(),
+        "user_uuid": user_uuid,
+        "job_kind": "thumbnail",
+        "job_key": "key",
+        "job_max_attempts": jobs.JOB_MAX_ATTEMPTS,
+        **{name: values[name] for name in COMPLAINT_VALUES},
+        **{f"photo_{name}": photo_values[name] for name in PHOTO_VALUES},
+    }
+
+
+async def create_complaint(user_uuid: uuid.UUID, values: dict, photo_values: dict):
+    # The statement is a SELECT on the outside; it must not go to a replica.
+    with database_definition.database.primary():
+        row = await database_definition.database.fetch_one(
+            create_sql(), create_values(user_uuid, values, photo_values)
+        )
+    if row["thumbnail_jobs"]:
+        jobs.runner.wake()
+    return row
@@ -0,0 +1,50 @@
+import datetime
+import hashlib
+from fastapi import Request, Response, status
+from managers.serialization import RowsJSONResponse
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    # Each part is a row identity or its updated_at, so the tag changes
+    # exactly when a write (or a membership change) changes the body.
+    digest = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        if isinstance(part, datetime.datetime):
+            part = part.isoformat()
+        digest.update(str(part).encode())
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()}"'
+
+
+def rows_etag(rows, *extra) -> str:
+    return make_etag(
+        *(part for row in rows for part in (row["uuid"], row["updated_at"])), *extra
+    )
+
+
+def matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored.
+    candidates = (tag.strip().removeprefix("W/") for tag in header.split(","))
+    return etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+def json_response(content, etag: str, status_code: int = 200) -> RowsJSONResponse:
+    return RowsJSONResponse(
+        content,
+        status_code,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
@@ -0,0 +1,163 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+import env_configuration
+from managers import metrics
+
+# Pin the cost in both directions so needs_update() flags hashes made before
+# a recalibration, whether the cost went up or down.
+BCRYPT_ROUNDS = int(env_configuration.config.get("BCRYPT_ROUNDS", 12))
+HASH_BUDGET_MS = float(env_configuration.config.get("HASH_BUDGET_MS", 250))
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+# "process" spreads bcrypt over every core, "thread" avoids the fork and
+# still frees the event loop because bcrypt releases the GIL.
+HASH_EXECUTOR = env_configuration.config.get("HASH_EXECUTOR", "process")
+HASH_WORKERS = int(env_configuration.config.get("HASH_WORKERS", os.cpu_count() or 1))
+# hash_passwords() submits HASH_WORKERS hashes at once, so a smaller queue
+# would refuse every bulk batch.
+HASH_QUEUE_SIZE = max(
+    int(env_configuration.config.get("HASH_QUEUE_SIZE", 64)), HASH_WORKERS
+)
+
+_executor: Executor | None = None
+
+hash_queue_depth = metrics.CallbackGauge(
+    "password_hash_queue_depth",
+    "Password hashes submitted and not finished",
+    lambda: {(): stats["queue_depth"]},
+)
+hash_rejected = metrics.Counter(
+    "password_hash_rejected_total", "Password hashes refused because the queue was full"
+)
+hash_logins = metrics.Counter(
+    "password_hash_logins_total", "Verified logins by stored bcrypt cost", ("cost",)
+)
+hash_population = metrics.Gauge(
+    "password_hash_population", "Stored password hashes by bcrypt cost", ("cost",)
+)
+rehashes = metrics.Counter(
+    "password_rehash_total", "Stale hashes rewritten after login", ("outcome",)
+)
+
+stats = {
+    "queue_depth": 0,
+    "max_queue_depth": 0,
+    "rejected_total": 0,
+    "hash_count": 0,
+    "hash_seconds_total": 0.0,
+    "hash_seconds_max": 0.0,
+}
+
+
+def verify_password(plain_password, hashed_password):
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def get_password_hash(password):
+    return pwd_context.hash(password)
+
+
+def needs_update(hashed_password: str) -> bool:
+    return pwd_context.needs_update(hashed_password)
+
+
+def hash_cost(hashed_password: str) -> int:
+    # $2b$12$<salt+digest>
+    return int(hashed_password.split("$")[2])
+
+
+def measure(rounds: int, samples: int = 3) -> float:
+    handler = pwd_context.handler("bcrypt").using(rounds=rounds)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        handler.hash("calibration-password")
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2]
+
+
+def calibrate(budget_seconds: float, samples: int = 3) -> tuple[int, dict]:
+    # Each extra round doubles the cost, so the walk stops right after the
+    # first cost over budget.
+    measure(4, samples=1)  # loads the bcrypt backend outside the timings
+    timings = {}
+    for rounds in range(4, 32):
+        timings[rounds] = measure(rounds, samples)
+        if timings[rounds] > budget_seconds:
+            break
+    fitting = [
+        rounds for rounds, seconds in timings.items() if seconds <= budget_seconds
+    ]
+    return (max(fitting) if fitting else 4), timings
+
+
+def get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if HASH_EXECUTOR == "thread":
+            _executor = ThreadPoolExecutor(
+                max_workers=HASH_WORKERS, thread_name_prefix="hashing"
+            )
+        else:
+            _executor = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def run_hashing(func, *args, operation: str = "hash"):
+    if stats["queue_depth"] >= HASH_QUEUE_SIZE:
+        stats["rejected_total"] += 1
+        hash_rejected.inc()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many authentication requests, try again later",
+            headers={"Retry-After": "1"},
+        )
+    stats["queue_depth"] += 1
+    stats["max_queue_depth"] = max(stats["max_queue_depth"], stats["queue_depth"])
+    start = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_executor(), func, *args)
+    finally:
+        elapsed = time.perf_counter() - start
+        stats["queue_depth"] -= 1
+        stats["hash_count"] += 1
+        stats["hash_seconds_total"] += elapsed
+        stats["hash_seconds_max"] = max(stats["hash_seconds_max"], elapsed)
+        metrics.hash_seconds.observe(elapsed, operation=operation)
+
+
+async def hash_password(password: str) -> str:
+    return await run_hashing(get_password_hash, password)
+
+
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    return await run_hashing(
+        verify_password, plain_password, hashed_password, operation="verify"
+    )
+
+
+async def hash_passwords(passwords: list[str]) -> list[str]:
+    # One batch per worker round keeps bulk work from filling the shared queue.
+    hashed = []
+    for start in range(0, len(passwords), HASH_WORKERS):
+        batch = passwords[start : start + HASH_WORKERS]
+        hashed.extend(await asyncio.gather(*(hash_password(p) for p in batch)))
+    return hashed
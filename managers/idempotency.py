@@ -0,0 +1,220 @@
+import asyncio
+import hashlib
+from typing import NamedTuple
+import orjson
+from multipart.multipart import parse_options_header
+import env_configuration
+from managers import metrics
+from managers.cache import TTLCache
+
+IDEMPOTENCY_CACHE_SIZE = int(
+    env_configuration.config.get("IDEMPOTENCY_CACHE_SIZE", 10000)
+)
+IDEMPOTENCY_TTL = float(env_configuration.config.get("IDEMPOTENCY_TTL", 86400))
+IDEMPOTENCY_MAX_RESPONSE_BYTES = int(
+    env_configuration.config.get("IDEMPOTENCY_MAX_RESPONSE_BYTES", 256 * 1024)
+)
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+responses = TTLCache(maxsize=IDEMPOTENCY_CACHE_SIZE, ttl=IDEMPOTENCY_TTL)
+_in_flight: dict[bytes, asyncio.Future] = {}
+
+idempotent_requests = metrics.Counter(
+    "idempotent_requests_total",
+    "Requests carrying an Idempotency-Key by outcome",
+    ("outcome",),
+)
+
+
+class StoredResponse(NamedTuple):
+    fingerprint: bytes
+    status: int
+    headers: list
+    body: bytes
+
+
+def store_key(headers: dict, key: bytes) -> bytes:
+    # Keys are only unique per client, so they are scoped by credentials.
+    return hashlib.sha256(headers.get(b"authorization", b"") + b"\0" + key).digest()
+
+
+class MultipartDigest:
+    # Clients pick a new random boundary for every multipart request, retries
+    # included, so it is masked out of the body before hashing.
+    def __init__(self, digest, boundary: bytes):
+        self._digest = digest
+        self._boundary = boundary
+        self._pending = b""
+
+    def update(self, data: bytes):
+        *complete, last = (self._pending + data).split(self._boundary)
+        for part in complete:
+            self._digest.update(part + b"\0")
+        # The tail may be the start of a boundary that the next chunk ends.
+        split = max(len(last) - len(self._boundary) + 1, 0)
+        self._digest.update(last[:split])
+        self._pending = last[split:]
+
+    def digest(self) -> bytes:
+        digest = self._digest.copy()
+        digest.update(self._pending)
+        return digest.digest()
+
+
+def request_digest(scope, headers: dict):
+    content_type, params = parse_options_header(headers.get(b"content-type", b""))
+    boundary = (
+        params.get(b"boundary")
+        if content_type.lower().startswith(b"multipart/")
+        else None
+    )
+    digest = hashlib.sha256()
+    for part in (
+        scope["method"].encode(),
+        scope["path"].encode(),
+        scope.get("query_string", b""),
+        # Without the boundary parameter for multipart bodies.
+        content_type if boundary else headers.get(b"content-type", b""),
+    ):
+        digest.update(part + b"\0")
+    if boundary:
+        return MultipartDigest(digest, boundary)
+    return digest
+
+
+async def drain(receive, digest) -> bool:
+    # Hashes whatever body the application did not read; False when the
+    # client went away before sending all of it.
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return False
+        digest.update(message.get("body", b""))
+        if not message.get("more_body", False):
+            return True
+
+
+async def send_json(send, status: int, content: dict):
+    body = orjson.dumps(content)
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        key = headers.get(b"idempotency-key")
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not 0 < len(key) <= 255:
+            await send_json(
+                send, 400, {"detail": "Idempotency-Key must be 1 to 255 characters"}
+            )
+            return
+
+        slot = store_key(headers, key)
+        digest = request_digest(scope, headers)
+        while True:
+            stored = responses.get(slot)
+            if stored is not None:
+                await self.replay(stored, receive, send, digest)
+                return
+            in_flight = _in_flight.get(slot)
+            if in_flight is None:
+                break
+            # A duplicate of a running request waits for it instead of
+            # running the handler again.
+            idempotent_requests.inc(outcome="coalesced")
+            await asyncio.shield(in_flight)
+
+        done = asyncio.get_running_loop().create_future()
+        _in_flight[slot] = done
+        try:
+            await self.execute(scope, receive, send, slot, digest)
+        finally:
+            del _in_flight[slot]
+            done.set_result(None)
+
+    async def execute(self, scope, receive, send, slot: bytes, digest):
+        body_complete = False
+        start = None
+        chunks = []
+        size = 0
+
+        async def receive_wrapper():
+            nonlocal body_complete
+            message = await receive()
+            if message["type"] == "http.request":
+                digest.update(message.get("body", b""))
+                body_complete = not message.get("more_body", False)
+            return message
+
+        async def send_wrapper(message):
+            nonlocal start, size
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+                if size <= IDEMPOTENCY_MAX_RESPONSE_BYTES:
+                    chunks.append(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, receive_wrapper, send_wrapper)
+        if not body_complete:
+            body_complete = await drain(receive, digest)
+        # Server errors are not remembered, so a retry runs the handler again.
+        if (
+            start is None
+            or start["status"] >= 500
+            or size > IDEMPOTENCY_MAX_RESPONSE_BYTES
+            or not body_complete
+        ):
+            idempotent_requests.inc(outcome="not_stored")
+            return
+        responses.set(
+            slot,
+            StoredResponse(
+                digest.digest(),
+                start["status"],
+                list(start.get("headers", [])),
+                b"".join(chunks),
+            ),
+        )
+        idempotent_requests.inc(outcome="stored")
+
+    async def replay(self, stored: StoredResponse, receive, send, digest):
+        if not await drain(receive, digest):
+            return
+        if digest.digest() != stored.fingerprint:
+            idempotent_requests.inc(outcome="mismatch")
+            await send_json(
+                send,
+                422,
+                {"detail": "Idempotency-Key was already used with a different request"},
+            )
+            return
+        idempotent_requests.inc(outcome="replayed")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": stored.status,
+                "headers": [*stored.headers, (b"idempotent-replayed", b"true")],
+            }
+        )
+        await send({"type": "http.response.body", "body": stored.body})
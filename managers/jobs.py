@@ -0,0 +1,260 @@
+import asyncio
+import datetime
+import random
+import time
+import sqlalchemy
+import database_definition
+import env_configuration
+from logger_config import logger
+from managers import metrics
+from models.job import job
+
+JOB_WORKERS = int(env_configuration.config.get("JOB_WORKERS", 4))
+JOB_POLL_INTERVAL = float(env_configuration.config.get("JOB_POLL_INTERVAL", 1.0))
+JOB_MAX_ATTEMPTS = int(env_configuration.config.get("JOB_MAX_ATTEMPTS", 5))
+JOB_BACKOFF_BASE = float(env_configuration.config.get("JOB_BACKOFF_BASE", 2.0))
+JOB_BACKOFF_MAX = float(env_configuration.config.get("JOB_BACKOFF_MAX", 300.0))
+JOB_LOCK_TIMEOUT = float(env_configuration.config.get("JOB_LOCK_TIMEOUT", 300.0))
+JOB_SHUTDOWN_TIMEOUT = float(env_configuration.config.get("JOB_SHUTDOWN_TIMEOUT", 10))
+
+handlers = {}
+
+job_wait_seconds = metrics.Histogram(
+    "job_wait_duration_seconds",
+    "Time from a job becoming due to a worker starting it",
+    ("kind",),
+)
+job_run_seconds = metrics.Histogram(
+    "job_run_duration_seconds", "Job handler run time", ("kind",)
+)
+jobs_processed = metrics.Counter(
+    "jobs_processed_total", "Finished job attempts by outcome", ("kind", "outcome")
+)
+
+
+def handler(kind: str):
+    def register(func):
+        handlers[kind] = func
+        return func
+
+    return register
+
+
+def backoff(attempts: int) -> float:
+    delay = min(JOB_BACKOFF_MAX, JOB_BACKOFF_BASE * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def enqueue_values(kind: str, payload: dict, delay: float = 0) -> dict:
+    values = {"kind": kind, "payload": payload, "max_attempts": JOB_MAX_ATTEMPTS}
+    if delay:
+        values["run_at"] = sqlalchemy.func.now() + datetime.timedelta(seconds=delay)
+    return values
+
+
+async def enqueue(kind: str, payload: dict, delay: float = 0) -> int:
+    job_id = await database_definition.database.execute(
+        job.insert().values(enqueue_values(kind, payload, delay))
+    )
+    runner.wake()
+    return job_id
+
+
+async def enqueue_many(kind: str, payloads: list[dict]):
+    if not payloads:
+        return
+    await database_definition.database.execute(
+        job.insert().values([enqueue_values(kind, payload) for payload in payloads])
+    )
+    runner.wake()
+
+
+async def claim(limit: int) -> list:
+    # SKIP LOCKED lets every worker (and every process) claim different rows
+    # without waiting on each other.
+    due = (
+        sqlalchemy.select(job.c.id)
+        .where(
+            job.c.status == "queued",
+            job.c.run_at <= sqlalchemy.func.now(),
+            job.c.attempts < job.c.max_attempts,
+        )
+        .order_by(job.c.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    return await database_definition.database.fetch_all(
+        job.update()
+        .where(job.c.id.in_(due))
+        .values(
+            status="running",
+            locked_at=sqlalchemy.func.now(),
+            attempts=job.c.attempts + 1,
+        )
+        .returning(
+            job.c.id,
+            job.c.kind,
+            job.c.payload,
+            job.c.attempts,
+            job.c.max_attempts,
+            # Identifies this claim: finish, fail and release leave the row
+            # alone once it has been requeued and claimed again.
+            job.c.locked_at,
+            sqlalchemy.func.extract(
+                "epoch", sqlalchemy.func.now() - job.c.run_at
+            ).label("waited"),
+        )
+    )
+
+
+async def requeue_stale():
+    # Jobs whose worker died mid-run are handed out again, unless that was
+    # their last attempt: a job that keeps killing its worker must not loop.
+    exhausted = job.c.attempts >= job.c.max_attempts
+    await database_definition.database.execute(
+        job.update()
+        .where(
+            job.c.status == "running",
+            # Untyped, "now() - $1" would resolve to timestamp - timestamp.
+            job.c.locked_at
+            < sqlalchemy.func.now()
+            - sqlalchemy.cast(
+                datetime.timedelta(seconds=JOB_LOCK_TIMEOUT), sqlalchemy.Interval
+            ),
+        )
+        .values(
+            status=sqlalchemy.case((exhausted, "failed"), else_="queued"),
+            locked_at=None,
+            last_error=sqlalchemy.case(
+                (exhausted, "worker lost while running the job"),
+                else_=job.c.last_error,
+            ),
+        )
+    )
+
+
+def claimed(row):
+    # Still the claim this worker holds, not a requeued one.
+    return sqlalchemy.and_(
+        job.c.id == row["id"],
+        job.c.status == "running",
+        job.c.locked_at == row["locked_at"],
+    )
+
+
+async def finish(row):
+    await database_definition.database.execute(job.delete().where(claimed(row)))
+
+
+async def fail(row, error: str):
+    values = {"locked_at": None, "last_error": error[:2000]}
+    if row["attempts"] >= row["max_attempts"]:
+        values["status"] = "failed"
+    else:
+        values["status"] = "queued"
+        values["run_at"] = sqlalchemy.func.now() + datetime.timedelta(
+            seconds=backoff(row["attempts"])
+        )
+    await database_definition.database.execute(
+        job.update().where(claimed(row)).values(values)
+    )
+    return values["status"]
+
+
+async def release(row):
+    # The attempt was interrupted, not failed, so it does not count.
+    await database_definition.database.execute(
+        job.update()
+        .where(claimed(row))
+        .values(status="queued", locked_at=None, attempts=job.c.attempts - 1)
+    )
+
+
+class JobRunner:
+    def __init__(self, concurrency: int, poll_interval: float):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._running: set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+        self._poller: asyncio.Task | None = None
+
+    def wake(self):
+        self._wakeup.set()
+
+    def start(self):
+        if self._poller is None and self.concurrency > 0:
+            self._wakeup = asyncio.Event()
+            self._poller = asyncio.create_task(self._poll())
+
+    async def stop(self):
+        if self._poller is None:
+            return
+        self._poller.cancel()
+        await asyncio.gather(self._poller, return_exceptions=True)
+        self._poller = None
+        if self._running:
+            await asyncio.wait(self._running, timeout=JOB_SHUTDOWN_TIMEOUT)
+        for task in list(self._running):
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def _poll(self):
+        last_stale_check = 0.0
+        while True:
+            try:
+                if time.monotonic() - last_stale_check > JOB_LOCK_TIMEOUT / 2:
+                    last_stale_check = time.monotonic()
+                    await requeue_stale()
+                free = self.concurrency - len(self._running)
+                claimed = await claim(free) if free > 0 else []
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Something was wrong while claiming jobs: %s", e)
+                claimed = []
+            for row in claimed:
+                task = asyncio.create_task(self._execute(row))
+                self._running.add(task)
+                task.add_done_callback(self._job_done)
+            if not claimed or len(self._running) >= self.concurrency:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def _job_done(self, task: asyncio.Task):
+        self._running.discard(task)
+        self.wake()
+
+    async def _execute(self, row):
+        kind = row["kind"]
+        job_wait_seconds.observe(max(float(row["waited"]), 0.0), kind=kind)
+        func = handlers.get(kind)
+        start = time.perf_counter()
+        try:
+            if func is None:
+                raise LookupError(f"no handler for job kind {kind!r}")
+            await func(row["payload"])
+        except asyncio.CancelledError:
+            await release(row)
+            raise
+        except Exception as e:
+            outcome = await fail(row, f"{type(e).__name__}: {e}")
+            logger.warning(
+                "Job %s (%s) attempt %s failed: %s", row["id"], kind, row["attempts"], e
+            )
+            jobs_processed.inc(kind=kind, outcome=outcome)
+        else:
+            await finish(row)
+            jobs_processed.inc(kind=kind, outcome="done")
+        finally:
+            job_run_seconds.observe(time.perf_counter() - start, kind=kind)
+
+
+runner = JobRunner(JOB_WORKERS, JOB_POLL_INTERVAL)
+
+metrics.CallbackGauge(
+    "jobs_running", "Jobs being run by this process", lambda: {(): len(runner._running)}
+)
@@ -0,0 +1,221 @@
+import bisect
+import time
+from threading import Lock
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def format_labels(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = Lock()
+        REGISTRY.register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self):
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{labels} {format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        for key, value in list(self._values.items()):
+            yield self.name, format_labels(self.labelnames, key), value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class CallbackGauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, callback, labelnames=()):
+        # callback returns {label values tuple: value}, read at scrape time
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def samples(self):
+        for key, value in self.callback().items():
+            yield self.name, format_labels(self.labelnames, key), value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += 1
+            series[2] += value
+
+    def time(self, **labels):
+        return Timer(self, labels)
+
+    def snapshot(self, **labels) -> dict:
+        counts, count, total = self._series.get(
+            self._key(labels), [[0] * (len(self.buckets) + 1), 0, 0.0]
+        )
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            buckets[format_value(bound)] = cumulative
+        return {"count": count, "sum": total, "buckets": buckets}
+
+    def samples(self):
+        for key, (counts, count, total) in list(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{format_value(bound)}"'
+                yield (
+                    f"{self.name}_bucket",
+                    format_labels(self.labelnames, key, le),
+                    cumulative,
+                )
+            yield f"{self.name}_count", format_labels(self.labelnames, key), count
+            yield f"{self.name}_sum", format_labels(self.labelnames, key), total
+
+
+class Timer:
+    def __init__(self, histogram: Histogram, labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric: Metric):
+        self.metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+http_requests = Counter(
+    "http_requests_total",
+    "HTTP responses by route and status",
+    ("method", "route", "status"),
+)
+http_request_seconds = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ("method", "route"),
+)
+http_in_flight = Gauge("http_requests_in_flight", "HTTP requests being served")
+db_query_seconds = Histogram(
+    "db_query_duration_seconds",
+    "Database call latency by query shape",
+    ("method", "shape"),
+)
+hash_seconds = Histogram(
+    "password_hash_duration_seconds",
+    "Password hashing latency including queue wait",
+    ("operation",),
+)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_in_flight.dec()
+            # The route template keeps label cardinality bounded.
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            http_request_seconds.observe(elapsed, method=scope["method"], route=path)
+            http_requests.inc(method=scope["method"], route=path, status=status_code)
@@ -0,0 +1,36 @@
+import base64
+import datetime
+import uuid
+from fastapi import HTTPException, status
+
+
+def encode_cursor(created_at: datetime.datetime, row_uuid: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{row_uuid}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_uuid = raw.split("|")
+        return datetime.datetime.fromisoformat(created_at), uuid.UUID(row_uuid)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def encode_search_cursor(rank: float, row_uuid: uuid.UUID) -> str:
+    raw = f"{rank!r}|{row_uuid}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        rank, row_uuid = raw.split("|")
+        return float(rank), uuid.UUID(row_uuid)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
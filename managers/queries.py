@@ -0,0 +1,24 @@
+import sqlalchemy
+from sqlalchemy.dialects import postgresql
+import database_definition
+
+
+async def insert_returning(table: sqlalchemy.Table, values: dict, *columns):
+    # The row and its server defaults (created_at, updated_at, role, status...)
+    # come back from the INSERT itself, so there is no follow-up SELECT.
+    query = table.insert().values(values).returning(*(columns or table.c))
+    return await database_definition.database.fetch_one(query)
+
+
+async def insert_ignoring_conflicts(
+    table: sqlalchemy.Table, rows: list[dict], *columns
+):
+    # Rows hitting a unique constraint are skipped instead of aborting the
+    # whole statement; only the inserted rows are returned.
+    query = (
+        postgresql.insert(table)
+        .values(rows)
+        .on_conflict_do_nothing()
+        .returning(*(columns or table.c))
+    )
+    return await database_definition.database.fetch_all(query)
@@ -0,0 +1,187 @@
+import contextlib
+import contextvars
+from typing import NamedTuple
+import databases
+import orjson
+import sqlalchemy
+
+RECORDED_METHODS = (
+    "fetch_all",
+    "fetch_one",
+    "fetch_val",
+    "execute",
+    "execute_many",
+    "iterate",
+)
+# Nodes reading fewer rows than this are not worth an index.
+SEQ_SCAN_MIN_ROWS = 1000
+MISESTIMATE_FACTOR = 10.0
+MISESTIMATE_MIN_ROWS = 100
+
+# Foreign keys without an index whose leading columns are the key columns.
+# Such keys make child lookups, and the check Postgres runs on the child
+# table when a parent row is deleted, scan the whole table.
+UNINDEXED_FOREIGN_KEYS = """
+SELECT c.conrelid::regclass::text AS table_name,
+       c.conname AS constraint_name,
+       ARRAY(
+           SELECT a.attname::text
+           FROM unnest(c.conkey) WITH ORDINALITY AS k(attnum, position)
+           JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum
+           ORDER BY k.position
+       ) AS columns
+FROM pg_constraint c
+WHERE c.contype = 'f'
+  AND c.connamespace = 'public'::regnamespace
+  AND NOT EXISTS (
+      SELECT 1
+      FROM pg_index i
+      WHERE i.indrelid = c.conrelid
+        AND i.indpred IS NULL
+        AND (string_to_array(i.indkey::text, ' ')::int2[])[1:cardinality(c.conkey)]
+            @> c.conkey
+  )
+ORDER BY 1, 2
+"""
+
+current_label = contextvars.ContextVar("query_label", default="background")
+
+
+class RecordedQuery(NamedTuple):
+    label: str
+    method: str
+    query: object
+    values: dict | None
+
+
+class Finding(NamedTuple):
+    kind: str
+    relation: str | None
+    detail: str
+
+
+@contextlib.contextmanager
+def label(name: str):
+    token = current_label.set(name)
+    try:
+        yield
+    finally:
+        current_label.reset(token)
+
+
+@contextlib.contextmanager
+def recording(database):
+    # Shadows the query methods on the instance, so every caller of
+    # database_definition.database is seen without touching the callers.
+    recorded: list[RecordedQuery] = []
+
+    def wrap(method: str):
+        original = getattr(database, method)
+
+        def recorder(query, values=None, *args, **kwargs):
+            if method == "execute_many":
+                values = values[0] if values else None
+            recorded.append(RecordedQuery(current_label.get(), method, query, values))
+            return original(query, values, *args, **kwargs)
+
+        return recorder
+
+    for method in RECORDED_METHODS:
+        setattr(database, method, wrap(method))
+    try:
+        yield recorded
+    finally:
+        for method in RECORDED_METHODS:
+            delattr(database, method)
+
+
+async def compile_query(database, query, values: dict | None = None):
+    # The same compilation databases applies before sending a query.
+    built = databases.core.Connection._build_query(query, values)
+    async with database.connection() as connection:
+        sql, args, _ = connection._connection._compile(built)
+    return sql, args
+
+
+async def explain(database, sql: str, args: list, analyze: bool = True) -> dict:
+    # ANALYZE executes the statement, so writes are rolled back.
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    async with database.connection() as connection:
+        raw = connection.raw_connection
+        transaction = raw.transaction()
+        await transaction.start()
+        try:
+            plan = await raw.fetchval(f"EXPLAIN ({options}) {sql}", *args)
+        finally:
+            await transaction.rollback()
+    return orjson.loads(plan)[0]
+
+
+async def unindexed_foreign_keys(database) -> list:
+    return await database.fetch_all(UNINDEXED_FOREIGN_KEYS)
+
+
+def foreign_key_columns(metadata: sqlalchemy.MetaData):
+    # The reads each foreign key implies: the child rows of one parent.
+    for table in metadata.sorted_tables:
+        for key in sorted(table.foreign_keys, key=lambda key: key.parent.name):
+            yield key.parent
+
+
+def walk(node: dict, limited: bool = False):
+    # limited: a Limit above the node may stop it before it produces the
+    # rows the planner estimated for a full run.
+    yield node, limited
+    limited = limited or node["Node Type"] == "Limit"
+    for child in node.get("Plans", ()):
+        yield from walk(child, limited)
+
+
+def plan_findings(
+    plan: dict,
+    seq_scan_min_rows: int = SEQ_SCAN_MIN_ROWS,
+    misestimate_factor: float = MISESTIMATE_FACTOR,
+) -> list[Finding]:
+    findings = []
+    for node, limited in walk(plan["Plan"]):
+        if "Actual Loops" not in node:
+            # A plan that was not run only has the estimates.
+            if (
+                node["Node Type"] == "Seq Scan"
+                and node["Plan Rows"] >= seq_scan_min_rows
+            ):
+                findings.append(
+                    Finding(
+                        "seq_scan",
+                        node["Relation Name"],
+                        f"estimated {node['Plan Rows']} rows",
+                    )
+                )
+            continue
+        loops = node["Actual Loops"]
+        actual = node["Actual Rows"]
+        if node["Node Type"] == "Seq Scan":
+            examined = (actual + node.get("Rows Removed by Filter", 0)) * loops
+            if examined >= seq_scan_min_rows:
+                detail = f"read {examined} rows to return {actual * loops}"
+                if "Filter" in node:
+                    detail += f", filter {node['Filter']}"
+                findings.append(Finding("seq_scan", node["Relation Name"], detail))
+        estimated = node["Plan Rows"]
+        if not loops or (limited and actual < estimated):
+            continue
+        low, high = sorted((estimated, actual))
+        if high >= MISESTIMATE_MIN_ROWS and high / max(low, 1) >= misestimate_factor:
+            findings.append(
+                Finding(
+                    "misestimate",
+                    node.get("Relation Name"),
+                    f"{node['Node Type']} estimated {estimated} rows, got {actual}",
+                )
+            )
+    return findings
+
+
+def buffers(plan: dict) -> tuple[int, int]:
+    top = plan["Plan"]
+    return top.get("Shared Hit Blocks", 0), top.get("Shared Read Blocks", 0)
@@ -0,0 +1,80 @@
+import os
+import re
+import anyio
+from fastapi import HTTPException, Request, status
+from starlette.responses import FileResponse
+from managers import conditional
+
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+class PartialFileResponse(FileResponse):
+    def __init__(self, path, start: int, end: int, size: int, **kwargs):
+        super().__init__(path, status_code=status.HTTP_206_PARTIAL_CONTENT, **kwargs)
+        self.start = start
+        self.end = end
+        self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+        self.headers["content-length"] = str(end - start + 1)
+
+    async def __call__(self, scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            remaining = self.end - self.start + 1
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                remaining -= len(chunk)
+                more_body = remaining > 0 and len(chunk) > 0
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": more_body,
+                    }
+                )
+                if not chunk:
+                    break
+
+
+def file_response(
+    request: Request, path, media_type: str | None = None, etag: str | None = None
+):
+    headers = {"accept-ranges": "bytes"}
+    if etag is not None:
+        if conditional.matches(request, etag):
+            return conditional.not_modified(etag)
+        headers["etag"] = etag
+        headers["cache-control"] = conditional.CACHE_CONTROL
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    size = stat_result.st_size
+    range_header = request.headers.get("range")
+    match = RANGE_PATTERN.match(range_header or "")
+    if match is None or match.groups() == ("", ""):
+        # Whole files go through FileResponse, which hands the path to the
+        # server (http.response.pathsend) when it supports zero-copy sends.
+        return FileResponse(
+            path, headers=headers, media_type=media_type, stat_result=stat_result
+        )
+    first, last = match.groups()
+    if first == "":
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"content-range": f"bytes */{size}"},
+        )
+    return PartialFileResponse(
+        path, start, end, size, headers=headers, media_type=media_type
+    )
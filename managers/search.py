@@ -0,0 +1,75 @@
+import sqlalchemy
+from sqlalchemy.dialects import postgresql
+import env_configuration
+import database_definition
+from models.complaint import complaint
+from models.enums_for_models import State
+from schemas.general import ComplaintsSchema
+from managers import complaints, metrics, pagination, serialization
+from managers.cache import TTLCache
+
+SEARCH_CONFIG = sqlalchemy.literal_column("'english'", type_=postgresql.REGCONFIG)
+
+search_cache = TTLCache(
+    maxsize=int(env_configuration.config.get("SEARCH_CACHE_SIZE", 256)),
+    ttl=float(env_configuration.config.get("SEARCH_CACHE_TTL", 30)),
+)
+
+metrics.CallbackGauge(
+    "search_cache_lookups",
+    "Complaint search cache hits and misses",
+    lambda: {
+        (outcome,): getattr(search_cache, outcome) for outcome in ("hits", "misses")
+    },
+    ("outcome",),
+)
+
+
+def normalize(terms: str) -> str:
+    return " ".join(terms.split())
+
+
+def build_query(terms: str, status: State | None, cursor: str | None, limit: int):
+    # The @@ match is answered by the GIN index; only matching rows get ranked.
+    ts_query = sqlalchemy.func.websearch_to_tsquery(SEARCH_CONFIG, terms)
+    rank = sqlalchemy.func.ts_rank(
+        complaint.c.search_vector, ts_query, type_=sqlalchemy.REAL
+    )
+    query = sqlalchemy.select(*complaints.OUT_COLUMNS, rank.label("rank")).where(
+        complaint.c.search_vector.op("@@")(ts_query)
+    )
+    if status is not None:
+        query = query.where(complaint.c.status == status)
+    if cursor is not None:
+        last_rank, row_uuid = pagination.decode_search_cursor(cursor)
+        query = query.where(
+            sqlalchemy.tuple_(rank, complaint.c.uuid)
+            < sqlalchemy.tuple_(sqlalchemy.cast(last_rank, sqlalchemy.REAL), row_uuid)
+        )
+    return query.order_by(rank.desc(), complaint.c.uuid.desc()).limit(limit + 1)
+
+
+async def search_complaints(
+    terms: str, status: State | None, cursor: str | None, limit: int
+) -> dict:
+    terms = normalize(terms)
+    key = (terms, status, cursor, limit)
+    page = search_cache.get(key)
+    if page is not None:
+        return page
+
+    rows = await database_definition.database.fetch_all(
+        build_query(terms, status, cursor, limit)
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = pagination.encode_search_cursor(
+            rows[-1]["rank"], rows[-1]["uuid"]
+        )
+    page = {
+        "items": serialization.rows_as(ComplaintsSchema.ComplaintSearchHit, rows),
+        "next_cursor": next_cursor,
+    }
+    search_cache.set(key, page)
+    return page
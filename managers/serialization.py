@@ -0,0 +1,28 @@
+import uuid
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+def encode_default(value):
+    # asyncpg hands back its own uuid.UUID subclass, which orjson only
+    # encodes natively when the type is exactly uuid.UUID.
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError
+
+
+class RowsJSONResponse(ORJSONResponse):
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content,
+            default=encode_default,
+            option=orjson.OPT_NON_STR_KEYS,
+        )
+
+
+def rows_as(schema: type[BaseModel], rows) -> list[dict]:
+    # Rows already carry the types the schema declares, so they are only cut
+    # down to its fields for orjson to encode.
+    fields = tuple(schema.model_fields)
+    return [{field: row[field] for field in fields} for row in rows]
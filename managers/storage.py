@@ -0,0 +1,93 @@
+import abc
+import hashlib
+import os
+import uuid
+from pathlib import Path
+import anyio
+import env_configuration
+
+
+class Upload:
+    def __init__(self, file, path: Path):
+        self.file = file
+        self.path = path
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+        # Set by commit: False when identical bytes were already stored.
+        self.created = False
+
+    async def write(self, chunk: bytes):
+        # The content hash is computed while the body streams in, so dedup
+        # never needs a second pass over the file.
+        self.sha256.update(chunk)
+        self.size += len(chunk)
+        await self.file.write(chunk)
+
+
+class StorageBackend(abc.ABC):
+    @abc.abstractmethod
+    async def open_upload(self) -> Upload: ...
+
+    @abc.abstractmethod
+    async def commit(self, upload: Upload, suffix: str = "") -> str: ...
+
+    @abc.abstractmethod
+    async def discard(self, upload: Upload): ...
+
+    @abc.abstractmethod
+    async def delete(self, key: str): ...
+
+    @abc.abstractmethod
+    def path(self, key: str) -> Path: ...
+
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root: str):
+        self.root = Path(root).resolve()
+
+    async def open_upload(self) -> Upload:
+        tmp = self.root / "tmp"
+        await anyio.to_thread.run_sync(lambda: tmp.mkdir(parents=True, exist_ok=True))
+        path = tmp / uuid.uuid4().hex
+        return Upload(await anyio.open_file(path, "wb"), path)
+
+    async def commit(self, upload: Upload, suffix: str = "") -> str:
+        await upload.file.aclose()
+        digest = upload.sha256.hexdigest()
+        key = f"sha256/{digest[:2]}/{digest}{suffix}"
+        target = self.path(key)
+
+        def move():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # link() fails when the key exists, so of two identical uploads
+            # committed at once exactly one creates the object.
+            try:
+                os.link(upload.path, target)
+                upload.created = True
+            except FileExistsError:
+                pass
+            upload.path.unlink()
+
+        await anyio.to_thread.run_sync(move)
+        return key
+
+    async def discard(self, upload: Upload):
+        await upload.file.aclose()
+        await anyio.to_thread.run_sync(lambda: upload.path.unlink(missing_ok=True))
+
+    async def delete(self, key: str):
+        path = self.path(key)
+        await anyio.to_thread.run_sync(lambda: path.unlink(missing_ok=True))
+
+    def path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root):
+            raise ValueError(f"Storage key outside of the storage root: {key}")
+        return path
+
+
+STORAGE_BACKENDS = {"local": LocalStorage}
+
+storage = STORAGE_BACKENDS[env_configuration.config.get("STORAGE_BACKEND", "local")](
+    env_configuration.config.get("STORAGE_ROOT", "media")
+)
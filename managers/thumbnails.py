@@ -0,0 +1,52 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import env_configuration
+from managers import jobs
+from managers.storage import storage
+
+THUMBNAIL_SIZE = (256, 256)
+THUMBNAIL_WORKERS = int(env_configuration.config.get("THUMBNAIL_WORKERS", 2))
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def thumbnail_key(key: str) -> str:
+    return f"{key}.thumbnail.jpg"
+
+
+def make_thumbnail(source: str, target: str):
+    # Pillow is only needed by the workers, so the app imports without it.
+    from PIL import Image
+
+    with Image.open(source) as image:
+        image.thumbnail(THUMBNAIL_SIZE)
+        image.convert("RGB").save(target, "JPEG", quality=85)
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=THUMBNAIL_WORKERS)
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def schedule_thumbnail(key: str):
+    await jobs.enqueue("thumbnail", {"key": key})
+
+
+@jobs.handler("thumbnail")
+async def generate_thumbnail(payload: dict):
+    key = payload["key"]
+    target = storage.path(thumbnail_key(key))
+    if target.exists():
+        return
+    await asyncio.get_running_loop().run_in_executor(
+        get_executor(), make_thumbnail, str(storage.path(key)), str(target)
+    )
@@ -0,0 +1,167 @@
+import mimetypes
+from typing import NamedTuple
+from fastapi import HTTPException, Request, status
+from multipart.multipart import MultipartParser, parse_options_header
+import sqlalchemy
+import database_definition
+import env_configuration
+from managers.storage import storage
+from models.photo import photo
+
+PHOTO_MAX_BYTES = int(env_configuration.config.get("PHOTO_MAX_BYTES", 20 * 1024 * 1024))
+# Part headers and plain fields are buffered in memory, unlike the file.
+FORM_FIELDS_MAX_BYTES = int(
+    env_configuration.config.get("FORM_FIELDS_MAX_BYTES", 64 * 1024)
+)
+
+
+class StoredImage(NamedTuple):
+    key: str
+    # False when identical bytes were already stored under the key.
+    created: bool
+
+    @property
+    def digest(self) -> str:
+        # sha256/ab/<digest><suffix>
+        return self.key.rsplit("/", 1)[-1].split(".", 1)[0]
+
+
+async def iter_multipart(request: Request):
+    """Parse a multipart body as it arrives, without spooling it.
+
+    Yields ("field", name, value) for plain fields and ("file", name, filename,
+    content_type), then ("data", chunk) for each piece of a file part.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Expected a multipart/form-data body",
+        )
+
+    events = []
+    part = {}
+    header = {"name": b"", "value": b""}
+    buffered = {"bytes": 0}
+
+    def buffer(data: bytes, start: int, end: int) -> bytes:
+        buffered["bytes"] += end - start
+        if buffered["bytes"] > FORM_FIELDS_MAX_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Form fields are limited to {FORM_FIELDS_MAX_BYTES} bytes",
+            )
+        return data[start:end]
+
+    def on_part_begin():
+        part.clear()
+        part.update(headers={}, data=b"", is_file=False)
+
+    def on_header_field(data, start, end):
+        header["name"] += buffer(data, start, end)
+
+    def on_header_value(data, start, end):
+        header["value"] += buffer(data, start, end)
+
+    def on_header_end():
+        part["headers"][header["name"].lower()] = header["value"]
+        header.update(name=b"", value=b"")
+
+    def on_headers_finished():
+        _, options = parse_options_header(
+            part["headers"].get(b"content-disposition", b"")
+        )
+        part["name"] = options.get(b"name", b"").decode()
+        if b"filename" in options:
+            part["is_file"] = True
+            events.append(
+                (
+                    "file",
+                    part["name"],
+                    options[b"filename"].decode(),
+                    part["headers"].get(b"content-type", b"").decode(),
+                )
+            )
+
+    def on_part_data(data, start, end):
+        if part["is_file"]:
+            events.append(("data", data[start:end]))
+        else:
+            part["data"] += buffer(data, start, end)
+
+    def on_part_end():
+        if not part["is_file"]:
+            events.append(("field", part["name"], part["data"].decode()))
+
+    parser = MultipartParser(
+        params[b"boundary"],
+        {
+            "on_part_begin": on_part_begin,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+        },
+    )
+    async for chunk in request.stream():
+        parser.write(chunk)
+        for event in events:
+            yield event
+        events.clear()
+    parser.finalize()
+    for event in events:
+        yield event
+
+
+async def receive_image(request: Request, *required: str) -> tuple[dict, StoredImage]:
+    # Streams the single image part into storage and returns the plain fields
+    # with the content-addressed storage key.
+    fields = {}
+    upload = None
+    suffix = ""
+    try:
+        async for event in iter_multipart(request):
+            if event[0] == "field":
+                fields[event[1]] = event[2]
+            elif event[0] == "file":
+                if upload is not None or not event[3].startswith("image/"):
+                    raise HTTPException(
+                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        detail="Expected a single image file",
+                    )
+                suffix = mimetypes.guess_extension(event[3]) or ""
+                upload = await storage.open_upload()
+            elif upload is not None:
+                await upload.write(event[1])
+                if upload.size > PHOTO_MAX_BYTES:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Photos are limited to {PHOTO_MAX_BYTES} bytes",
+                    )
+        if upload is None or not all(fields.get(name) for name in required):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"{', '.join(required)} and file are required",
+            )
+    except BaseException:
+        if upload is not None:
+            await storage.discard(upload)
+        raise
+    key = await storage.commit(upload, suffix)
+    return fields, StoredImage(key, upload.created)
+
+
+async def discard_image(image: StoredImage):
+    # For requests that fail after receive_image. Identical content shares
+    # one object, so a key that existed before the request, or that another
+    # request's photo row already points to, is kept.
+    if not image.created:
+        return
+    with database_definition.database.primary():
+        referenced = await database_definition.database.fetch_val(
+            sqlalchemy.select(photo.c.uuid).where(photo.c.url == image.key).limit(1)
+        )
+    if referenced is None:
+        await storage.delete(image.key)
@@ -0,0 +1,114 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "photos",
+        sa.Column("uuid", sa.Uuid(), nullable=False),
+        sa.Column("title", sa.String(length=50), nullable=False),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("url", sa.String(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("uuid"),
+        sa.UniqueConstraint("description"),
+        sa.UniqueConstraint("title"),
+        sa.UniqueConstraint("url"),
+        sa.UniqueConstraint("uuid"),
+    )
+    op.create_table(
+        "users_cs",
+        sa.Column("uuid", sa.Uuid(), nullable=False),
+        sa.Column("username", sa.String(length=20), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("password", sa.String(), nullable=False),
+        sa.Column(
+            "role",
+            sa.Enum("approver", "complainer", "admin", "user", name="roletype"),
+            server_default="user",
+            nullable=False,
+        ),
+        sa.Column(
+            "is_active", sa.Boolean(), server_default=sa.text("false"), nullable=False
+        ),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("uuid"),
+        sa.UniqueConstraint("email"),
+        sa.UniqueConstraint("username"),
+        sa.UniqueConstraint("uuid"),
+    )
+    op.create_table(
+        "complaints",
+        sa.Column("uuid", sa.Uuid(), nullable=False),
+        sa.Column("title", sa.String(length=50), nullable=False),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("photo_uuid", sa.Uuid(), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum("pending", "approved", "rejected", name="state"),
+            server_default="pending",
+            nullable=False,
+        ),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.ForeignKeyConstraint(["photo_uuid"], ["photos.uuid"]),
+        sa.PrimaryKeyConstraint("uuid"),
+        sa.UniqueConstraint("uuid"),
+    )
+    op.create_table(
+        "users_cs_complaint",
+        sa.Column("uuid", sa.Uuid(), nullable=False),
+        sa.Column("user_uuid", sa.Uuid(), nullable=False),
+        sa.Column("complaint_uuid", sa.Uuid(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.ForeignKeyConstraint(["complaint_uuid"], ["complaints.uuid"]),
+        sa.ForeignKeyConstraint(["user_uuid"], ["users_cs.uuid"]),
+        sa.PrimaryKeyConstraint("uuid"),
+        sa.UniqueConstraint("uuid"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("users_cs_complaint")
+    op.drop_table("complaints")
+    op.drop_table("users_cs")
+    op.drop_table("photos")
+    sa.Enum(name="state").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="roletype").drop(op.get_bind(), checkfirst=True)
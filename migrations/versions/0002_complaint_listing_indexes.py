@@ -0,0 +1,37 @@
+"""Complaint listing indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_complaints_created_at_uuid",
+        "complaints",
+        [sa.text("created_at DESC"), sa.text("uuid DESC")],
+    )
+    op.create_index(
+        "ix_complaints_status_created_at_uuid",
+        "complaints",
+        ["status", sa.text("created_at DESC"), sa.text("uuid DESC")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_complaints_status_created_at_uuid", table_name="complaints")
+    op.drop_index("ix_complaints_created_at_uuid", table_name="complaints")
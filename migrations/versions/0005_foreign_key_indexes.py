@@ -0,0 +1,36 @@
+"""Foreign key indexes
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_complaints_photo_uuid", "complaints", ["photo_uuid"])
+    op.create_index(
+        "ix_users_cs_complaint_user_uuid", "users_cs_complaint", ["user_uuid"]
+    )
+    op.create_index(
+        "ix_users_cs_complaint_complaint_uuid", "users_cs_complaint", ["complaint_uuid"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_users_cs_complaint_complaint_uuid", table_name="users_cs_complaint"
+    )
+    op.drop_index("ix_users_cs_complaint_user_uuid", table_name="users_cs_complaint")
+    op.drop_index("ix_complaints_photo_uuid", table_name="complaints")
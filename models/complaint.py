@@ -1,4 +1,5 @@
 import sqlalchemy
+from sqlalchemy.dialects import postgresql
 import database_definition
 from models import enums_for_models
 
@@ -31,4 +32,34 @@ complaint = sqlalchemy.Table(
         server_default=sqlalchemy.func.now(),
         onupdate=sqlalchemy.func.now(),
     ),
+    # Title matches outrank description matches; Postgres keeps the vector
+    # in step with the text on every write.
+    sqlalchemy.Column(
+        "search_vector",
+        postgresql.TSVECTOR,
+        sqlalchemy.Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+    ),
+    # Keyset pagination walks (created_at, uuid) newest first, with or
+    # without a status filter.
+    sqlalchemy.Index(
+        "ix_complaints_created_at_uuid",
+        sqlalchemy.text("created_at DESC"),
+        sqlalchemy.text("uuid DESC"),
+    ),
+    sqlalchemy.Index(
+        "ix_complaints_status_created_at_uuid",
+        "status",
+        sqlalchemy.text("created_at DESC"),
+        sqlalchemy.text("uuid DESC"),
+    ),
+    sqlalchemy.Index(
+        "ix_complaints_search_vector", "search_vector", postgresql_using="gin"
+    ),
+    # Postgres does not index foreign keys by itself; without this, deleting
+    # a photo scans every complaint for references.
+    sqlalchemy.Index("ix_complaints_photo_uuid", "photo_uuid"),
 )
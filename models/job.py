@@ -0,0 +1,42 @@
+import sqlalchemy
+from sqlalchemy.dialects import postgresql
+import database_definition
+
+job = sqlalchemy.Table(
+    "jobs",
+    database_definition.metadata,
+    sqlalchemy.Column(
+        "id", sqlalchemy.BigInteger, sqlalchemy.Identity(), primary_key=True
+    ),
+    sqlalchemy.Column("kind", sqlalchemy.String(50), nullable=False),
+    sqlalchemy.Column("payload", postgresql.JSONB, nullable=False),
+    # queued -> running -> (deleted on success) | queued again | failed
+    sqlalchemy.Column(
+        "status", sqlalchemy.String(10), nullable=False, server_default="queued"
+    ),
+    sqlalchemy.Column(
+        "attempts", sqlalchemy.Integer, nullable=False, server_default="0"
+    ),
+    sqlalchemy.Column("max_attempts", sqlalchemy.Integer, nullable=False),
+    sqlalchemy.Column(
+        "run_at",
+        sqlalchemy.DateTime,
+        nullable=False,
+        server_default=sqlalchemy.func.now(),
+    ),
+    sqlalchemy.Column("locked_at", sqlalchemy.DateTime),
+    sqlalchemy.Column("last_error", sqlalchemy.Text),
+    sqlalchemy.Column(
+        "created_at",
+        sqlalchemy.DateTime,
+        nullable=False,
+        server_default=sqlalchemy.func.now(),
+    ),
+    # Workers claim the oldest due job; failed and running rows stay out of
+    # the index.
+    sqlalchemy.Index(
+        "ix_jobs_queued_run_at",
+        "run_at",
+        postgresql_where=sqlalchemy.text("status = 'queued'"),
+    ),
+)
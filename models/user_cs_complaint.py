@@ -24,4 +24,7 @@ user_cs_complaint = sqlalchemy.Table(
         server_default=sqlalchemy.func.now(),
         onupdate=sqlalchemy.func.now(),
     ),
+    # A user's complaints and a complaint's owner are both looked up here.
+    sqlalchemy.Index("ix_users_cs_complaint_user_uuid", "user_uuid"),
+    sqlalchemy.Index("ix_users_cs_complaint_complaint_uuid", "complaint_uuid"),
 )
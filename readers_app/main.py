@@ -3,13 +3,17 @@ from passlib.context import CryptContext
 import model_schemas
 from datetime import datetime, timedelta, timezone
 from contextlib import asynccontextmanager
+import hashlib
+import os
 import uuid
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import databases
 import sqlalchemy
 from dotenv import dotenv_values
 from typing import Annotated, List
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import (
     OAuth2PasswordBearer,
     OAuth2PasswordRequestForm,
@@ -73,6 +77,7 @@ async def lifespan(app: FastAPI):
     await data.connect()
     yield
     await data.disconnect()
+    hash_executor.shutdown(wait=False, cancel_futures=True)
     await asyncio.sleep(2)
 
 
@@ -81,6 +86,11 @@ information.update({"lifespan": lifespan})
 app = FastAPI(**information)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+hash_executor = ThreadPoolExecutor(
+    max_workers=int(config.get("HASH_WORKERS", os.cpu_count() or 1)),
+    thread_name_prefix="hashing",
+)
 
 
 def verify_password(plain_password, hashed_password):
@@ -91,11 +101,16 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+async def run_hashing(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(hash_executor, func, *args)
+
+
 async def get_user(username: str):
     current_user = await data.fetch_one(
         users.select().where(users.c.username == username)
     )
-    return dict(current_user)
+    return dict(current_user) if current_user is not None else None
 
 
 async def authenticate_user(username: str, password: str):
@@ -107,7 +122,7 @@ async def authenticate_user(username: str, password: str):
         return False
     if not user_dict.get("is_active"):
         return False
-    if not verify_password(password, user_dict.get("password")):
+    if not await run_hashing(verify_password, password, user_dict.get("password")):
         return False
     return user_dict
 
@@ -125,9 +140,21 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return encoded_jwt
 
 
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+async def iterate_ndjson(query, schema):
+    # Rows are written as the cursor yields them, so memory stays flat no
+    # matter how large the table is.
+    async for row in data.iterate(query):
+        item = schema.model_validate(row, from_attributes=True)
+        yield item.model_dump_json().encode() + b"\n"
+
+
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)]
-) -> model_schemas.BaseUsers:
+) -> model_schemas.CurrentUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -146,12 +173,12 @@ async def get_current_user(
     user = await get_user(username)
     if user is None:
         raise credentials_exception
-    return model_schemas.BaseUsers(**user)
+    return model_schemas.CurrentUser(**user)
 
 
 async def get_current_active_user(
-    current_user: Annotated[model_schemas.BaseUsers, Depends(get_current_user)],
-) -> model_schemas.BaseUsers:
+    current_user: Annotated[model_schemas.CurrentUser, Depends(get_current_user)],
+) -> model_schemas.CurrentUser:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
@@ -174,19 +201,48 @@ async def get_current_active_admin(
     status_code=200,
 )
 async def get_all_users(
-    _: Annotated[List[model_schemas.BaseUsers], Depends(get_current_active_admin)]
+    request: Request,
+    _: Annotated[List[model_schemas.BaseUsers], Depends(get_current_active_admin)],
 ):
     query = users.select()
+    if wants_ndjson(request):
+        return StreamingResponse(
+            iterate_ndjson(query, model_schemas.BaseUsers),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
     return await data.fetch_all(query)
 
 
+def make_etag(username: str, updated_at: datetime) -> str:
+    digest = hashlib.blake2b(
+        f"{username}\0{updated_at.isoformat()}".encode(), digest_size=12
+    )
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match", "")
+    if header.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
 @app.get("/me/", tags=["me"], response_model=model_schemas.BaseUsers, status_code=200)
 async def get_current_user_information(
-    user: Annotated[model_schemas.BaseUsers, Depends(get_current_active_user)]
+    request: Request,
+    response: Response,
+    user: Annotated[model_schemas.CurrentUser, Depends(get_current_active_user)],
 ):
-    # print(f"USER in get_current_user_information: {user}")
-    query = users.select().where(users.c.username == user.username)
-    return await data.fetch_one(query)
+    # get_current_user already read the whole row; no second lookup.
+    etag = make_etag(user.username, user.updated_at)
+    if etag_matches(request, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+        )
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return user
 
 
 @app.post(
@@ -196,12 +252,11 @@ async def get_current_user_information(
     status_code=201,
 )
 async def create_user(user: model_schemas.UserSignIn):
-    user.password = get_password_hash(user.password)
+    user.password = await run_hashing(get_password_hash, user.password)
     uuid_value = uuid.uuid4()
     data_to_insert = {"uuid": uuid_value, **user.model_dump()}
-    query = users.insert().values(data_to_insert)
-    await data.execute(query)
-    return await data.fetch_one(users.select().where(users.c.uuid == uuid_value))
+    query = users.insert().values(data_to_insert).returning(*users.c)
+    return await data.fetch_one(query)
 
 
 @app.post("/token/", tags=["token"], status_code=201)
@@ -39,6 +39,10 @@ class BaseUsers(BaseModel):
     is_active: bool = False
 
 
+class CurrentUser(BaseUsers):
+    updated_at: datetime.datetime
+
+
 class UserSignIn(BaseUsers):
     password: str
 
@@ -0,0 +1,62 @@
+import json
+from fastapi.testclient import TestClient
+import main
+import model_schemas
+
+USERS = [
+    {
+        "username": "ana",
+        "email": "ana@example.com",
+        "password": "hash",
+        "role": model_schemas.UserRolesEnum.admin,
+        "is_active": True,
+    },
+    {
+        "username": "luis",
+        "email": "luis@example.com",
+        "password": "hash",
+        "role": model_schemas.UserRolesEnum.guest,
+        "is_active": False,
+    },
+]
+
+
+def client(monkeypatch) -> TestClient:
+    async def iterate(query, values=None):
+        for row in USERS:
+            yield row
+
+    async def fetch_all(query, values=None):
+        return USERS
+
+    monkeypatch.setattr(main.data, "iterate", iterate)
+    monkeypatch.setattr(main.data, "fetch_all", fetch_all)
+    monkeypatch.setitem(
+        main.app.dependency_overrides, main.get_current_active_admin, lambda: None
+    )
+    return TestClient(main.app)
+
+
+def test_users_as_ndjson_is_one_object_per_line(monkeypatch):
+    response = client(monkeypatch).get(
+        "/users/", headers={"Accept": main.NDJSON_MEDIA_TYPE}
+    )
+    assert response.headers["content-type"] == main.NDJSON_MEDIA_TYPE
+    lines = response.text.splitlines()
+    assert len(lines) == len(USERS)
+    assert [json.loads(line) for line in lines] == [
+        {
+            "username": user["username"],
+            "email": user["email"],
+            "role": user["role"].value,
+            "is_active": user["is_active"],
+        }
+        for user in USERS
+    ]
+
+
+def test_users_default_to_a_json_array(monkeypatch):
+    response = client(monkeypatch).get("/users/")
+    assert response.headers["content-type"] == "application/json"
+    assert [user["username"] for user in response.json()] == ["ana", "luis"]
+    assert "password" not in response.json()[0]
@@ -0,0 +1,231 @@
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from asyncpg import UniqueViolationError
+from pydantic import ValidationError
+from typing import Annotated
+import sqlalchemy
+from sqlalchemy.dialects import postgresql
+from schemas.general import ComplaintsSchema, UsersSchema
+from models.complaint import complaint
+from models.enums_for_models import State
+from managers import (
+    authorization,
+    complaints,
+    conditional,
+    pagination,
+    search,
+    serialization,
+    uploads,
+)
+import database_definition
+from logger_config import logger
+
+router = APIRouter(tags=["Complaints"])
+
+
+def uuid_array(name: str, values: list):
+    return sqlalchemy.bindparam(name, values, type_=postgresql.ARRAY(sqlalchemy.Uuid))
+
+
+@router.post(
+    "/complaints/", response_model=ComplaintsSchema.ComplaintOut, status_code=201
+)
+async def create_complaint(
+    request: Request,
+    current_user: Annotated[
+        UsersSchema.CurrentUser, Depends(authorization.get_current_active_user)
+    ],
+):
+    fields, image = await uploads.receive_image(request, "title", "description")
+    try:
+        complaint_in = ComplaintsSchema.ComplaintIn.model_validate(fields)
+    except ValidationError as e:
+        logger.error("Something was wrong with the complaint fields: %s", e)
+        await uploads.discard_image(image)
+        raise HTTPException(
+            status_code=422,
+            detail="; ".join(
+                f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                for error in e.errors()
+            ),
+        )
+    try:
+        row = await complaints.create_complaint(
+            current_user.uuid,
+            complaint_in.model_dump(include={"title", "description", "amount"}),
+            complaints.photo_values(complaint_in, image),
+        )
+    except UniqueViolationError as e:
+        logger.error("Something was wrong with unique field: %s", e)
+        await uploads.discard_image(image)
+        raise HTTPException(
+            status_code=400,
+            detail="Photo with that title or description already exists",
+        )
+    return serialization.RowsJSONResponse(
+        serialization.rows_as(ComplaintsSchema.ComplaintOut, [row])[0], 201
+    )
+
+
+def listing_query(columns, status: State | None, cursor: str | None, limit: int):
+    # Keyset pagination: every page is an index range scan that starts after
+    # the last (created_at, uuid) seen, so page N costs the same as page 1.
+    query = sqlalchemy.select(*columns)
+    if status is not None:
+        query = query.where(complaint.c.status == status)
+    if cursor is not None:
+        created_at, row_uuid = pagination.decode_cursor(cursor)
+        query = query.where(
+            sqlalchemy.tuple_(complaint.c.created_at, complaint.c.uuid)
+            < sqlalchemy.tuple_(created_at, row_uuid)
+        )
+    query = query.order_by(complaint.c.created_at.desc(), complaint.c.uuid.desc())
+    return query.limit(limit + 1)
+
+
+def page_etag(rows, limit: int) -> str:
+    return conditional.rows_etag(rows[:limit], len(rows) > limit)
+
+
+@router.get(
+    "/complaints/", response_model=ComplaintsSchema.ComplaintPage, status_code=200
+)
+async def get_complaints(
+    request: Request,
+    _: Annotated[
+        UsersSchema.CurrentUser, Depends(authorization.get_current_active_user)
+    ],
+    status: State | None = None,
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+):
+    if request.headers.get("if-none-match"):
+        versions = await database_definition.database.fetch_all(
+            listing_query(
+                (complaint.c.uuid, complaint.c.updated_at), status, cursor, limit
+            )
+        )
+        etag = page_etag(versions, limit)
+        if conditional.matches(request, etag):
+            return conditional.not_modified(etag)
+
+    rows = await database_definition.database.fetch_all(
+        listing_query(complaints.OUT_COLUMNS, status, cursor, limit)
+    )
+    etag = page_etag(rows, limit)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = pagination.encode_cursor(rows[-1]["created_at"], rows[-1]["uuid"])
+    return conditional.json_response(
+        {
+            "items": serialization.rows_as(ComplaintsSchema.ComplaintOut, rows),
+            "next_cursor": next_cursor,
+        },
+        etag,
+    )
+
+
+@router.get(
+    "/complaints/search/",
+    response_model=ComplaintsSchema.ComplaintSearchPage,
+    status_code=200,
+)
+async def search_complaints(
+    _: Annotated[
+        UsersSchema.CurrentUser, Depends(authorization.get_current_active_user)
+    ],
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    status: State | None = None,
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+):
+    page = await search.search_complaints(q, status, cursor, limit)
+    return serialization.RowsJSONResponse(page)
+
+
+@router.get(
+    "/complaints/{complaint_uuid}/",
+    response_model=ComplaintsSchema.ComplaintOut,
+    status_code=200,
+)
+async def get_complaint(
+    request: Request,
+    complaint_uuid: uuid.UUID,
+    _: Annotated[
+        UsersSchema.CurrentUser, Depends(authorization.get_current_active_user)
+    ],
+):
+    if request.headers.get("if-none-match"):
+        updated_at = await database_definition.database.fetch_val(
+            sqlalchemy.select(complaint.c.updated_at).where(
+                complaint.c.uuid == complaint_uuid
+            )
+        )
+        if updated_at is None:
+            raise HTTPException(status_code=404, detail="Not found")
+        etag = conditional.make_etag(complaint_uuid, updated_at)
+        if conditional.matches(request, etag):
+            return conditional.not_modified(etag)
+
+    row = await database_definition.database.fetch_one(
+        sqlalchemy.select(*complaints.OUT_COLUMNS).where(
+            complaint.c.uuid == complaint_uuid
+        )
+    )
+    if row is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return conditional.json_response(
+        serialization.rows_as(ComplaintsSchema.ComplaintOut, [row])[0],
+        conditional.make_etag(row["uuid"], row["updated_at"]),
+    )
+
+
+@router.post(
+    "/complaints/status/",
+    response_model=ComplaintsSchema.StatusTransitionResponse,
+    status_code=200,
+)
+async def transition_complaints(
+    transition: ComplaintsSchema.StatusTransitionIn,
+    _: Annotated[
+        UsersSchema.CurrentUser, Depends(authorization.get_current_active_approver)
+    ],
+):
+    uuids = list(dict.fromkeys(transition.uuids))
+    # One set-based statement: only pending rows move, so re-deciding a
+    # complaint is reported instead of silently overwriting it.
+    updated = await database_definition.database.fetch_all(
+        complaint.update()
+        .where(complaint.c.uuid == sqlalchemy.any_(uuid_array("uuids", uuids)))
+        .where(complaint.c.status == State.pending)
+        .values(status=transition.status)
+        .returning(complaint.c.uuid, complaint.c.status)
+    )
+    results = {row["uuid"]: ("updated", row["status"]) for row in updated}
+
+    remaining = [row_uuid for row_uuid in uuids if row_uuid not in results]
+    if remaining:
+        with database_definition.database.primary():
+            existing = await database_definition.database.fetch_all(
+                sqlalchemy.select(complaint.c.uuid, complaint.c.status).where(
+                    complaint.c.uuid
+                    == sqlalchemy.any_(uuid_array("remaining", remaining))
+                )
+            )
+        for row in existing:
+            results[row["uuid"]] = ("not_pending", row["status"])
+    if updated:
+        search.search_cache.clear()
+
+    items = []
+    for row_uuid in uuids:
+        outcome, state = results.get(row_uuid, ("not_found", None))
+        items.append(
+            {
+                "uuid": row_uuid,
+                "outcome": outcome,
+                "status": state.value if state is not None else None,
+            }
+        )
+    return serialization.RowsJSONResponse({"updated": len(updated), "results": items})
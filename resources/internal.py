@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends
+from typing import Annotated
+from fastapi.responses import PlainTextResponse
+import database_definition
+from schemas.general import UsersSchema
+from managers import authentication, authorization, hashing, metrics
+
+router = APIRouter(tags=["Internal"], include_in_schema=False)
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(authorization.verify_metrics_token)],
+    status_code=200,
+)
+async def get_metrics():
+    authentication.refresh_hash_population()
+    return PlainTextResponse(
+        metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
+@router.get("/internal/pool/", status_code=200)
+async def get_pool_stats(
+    _: Annotated[
+        UsersSchema.CurrentUser, Depends(authorization.get_current_active_admin)
+    ],
+):
+    return {
+        "database": database_definition.database.pool_stats(),
+        "hashing": hashing.stats,
+    }
@@ -35,11 +35,11 @@ async def login_for_access_token(
         )
         return TokenSchema.TokenResponse(access_token=access_token, token_type="bearer")
     except HTTPException as e:
-        logger.error(f"Something was wrong with authentication: {e}")
+        logger.error("Something was wrong with authentication: %s", e)
         raise e
     except ValidationException as e:
-        logger.error(f"Something was wrong with the validation: {e}")
+        logger.error("Something was wrong with the validation: %s", e)
         raise HTTPException(422, "Some field has errors")
     except Exception as e:
-        logger.warning(f"Something was wrong with the server: {e}")
+        logger.warning("Something was wrong with the server: %s", e)
         raise HTTPException(500, "Something was wrong")
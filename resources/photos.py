@@ -0,0 +1,92 @@
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from typing import Annotated
+from asyncpg import UniqueViolationError
+import sqlalchemy
+import database_definition
+from logger_config import logger
+from models.photo import photo
+from schemas.general import PhotosSchema, UsersSchema
+from managers import authorization, queries, ranges, thumbnails, uploads
+from managers.storage import storage
+
+router = APIRouter(tags=["Photos"])
+
+
+async def get_photo_key_or_404(photo_uuid: uuid.UUID) -> str:
+    key = await database_definition.database.fetch_val(
+        sqlalchemy.select(photo.c.url).where(photo.c.uuid == photo_uuid)
+    )
+    if key is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    return key
+
+
+def content_etag(key: str, variant: str = "") -> str:
+    # Keys are content addressed (sha256/ab/<digest>), so the digest already
+    # names the exact bytes.
+    return f'"{variant}{key.rsplit("/", 1)[-1]}"'
+
+
+@router.post("/photos/", response_model=PhotosSchema.PhotoOut, status_code=201)
+async def upload_photo(
+    request: Request,
+    response: Response,
+    _: Annotated[
+        UsersSchema.CurrentUser, Depends(authorization.get_current_active_user)
+    ],
+):
+    fields, image = await uploads.receive_image(request, "title", "description")
+    key = image.key
+    existing = await database_definition.database.fetch_one(
+        photo.select().where(photo.c.url == key)
+    )
+    if existing is not None:
+        response.status_code = status.HTTP_200_OK
+        return existing
+    try:
+        created_photo = await queries.insert_returning(
+            photo,
+            {
+                "uuid": uuid.uuid4(),
+                "title": fields["title"],
+                "description": fields["description"],
+                "url": key,
+            },
+        )
+    except UniqueViolationError as e:
+        logger.error("Something was wrong with unique field: %s", e)
+        await uploads.discard_image(image)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Photo with that title or description already exists",
+        )
+    await thumbnails.schedule_thumbnail(key)
+    return created_photo
+
+
+@router.get("/photos/{photo_uuid}/content", status_code=200)
+async def download_photo(
+    request: Request,
+    photo_uuid: uuid.UUID,
+    _: Annotated[
+        UsersSchema.CurrentUser, Depends(authorization.get_current_active_user)
+    ],
+):
+    key = await get_photo_key_or_404(photo_uuid)
+    return ranges.file_response(request, storage.path(key), etag=content_etag(key))
+
+
+@router.get("/photos/{photo_uuid}/thumbnail", status_code=200)
+async def download_thumbnail(
+    request: Request,
+    photo_uuid: uuid.UUID,
+    _: Annotated[
+        UsersSchema.CurrentUser, Depends(authorization.get_current_active_user)
+    ],
+):
+    key = await get_photo_key_or_404(photo_uuid)
+    path = storage.path(thumbnails.thumbnail_key(key))
+    if not path.exists():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not ready")
+    return ranges.file_response(request, path, etag=content_etag(key, "thumb-"))
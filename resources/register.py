@@ -1,42 +1,210 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
 from fastapi.exceptions import ValidationException
+from pydantic import ValidationError
 from schemas.general import UsersSchema
+import orjson
 import uuid
-from managers import authentication
+import database_definition
+import env_configuration
+from managers import hashing, authorization, jobs, notifications, queries
 from asyncpg import UniqueViolationError
 from models.user_cs import user_cs
-import database_definition
 from logger_config import logger
 
 router = APIRouter(tags=["Register"])
 
+BULK_REGISTER_MAX_ROWS = int(
+    env_configuration.config.get("BULK_REGISTER_MAX_ROWS", 10000)
+)
+BULK_REGISTER_BATCH_SIZE = 1000
+
 
 @router.post("/register/", response_model=UsersSchema.UserSignOut, status_code=201)
 async def create_user(user: UsersSchema.UserSignIn):
     try:
-        user.password = authentication.get_password_hash(user.password)
+        user.password = await hashing.hash_password(user.password)
         uuid_value = uuid.uuid4()
         data_to_insert = {"uuid": uuid_value, "is_active": False, **user.model_dump()}
-        query = user_cs.insert().values(data_to_insert)
-        await database_definition.database.execute(query)
-        return await database_definition.database.fetch_one(
-            user_cs.select().where(user_cs.c.uuid == uuid_value)
-        )
+        # The activation job commits with the user or not at all.
+        async with database_definition.database.transaction():
+            created_user = await queries.insert_returning(
+                user_cs,
+                data_to_insert,
+                user_cs.c.uuid,
+                user_cs.c.username,
+                user_cs.c.email,
+                user_cs.c.role,
+                user_cs.c.is_active,
+                user_cs.c.created_at,
+                user_cs.c.updated_at,
+            )
+            await notifications.schedule_activation_email(created_user)
+        authorization.invalidate_user(user.username)
+        return created_user
+    except HTTPException as e:
+        logger.error("Something was wrong with the registration: %s", e)
+        raise e
     except ValidationException as e:
-        logger.error(f"Something was wrong with the validation: {e}")
+        logger.error("Something was wrong with the validation: %s", e)
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="Some field has errors",
         )
     except UniqueViolationError as e:
-        logger.error(f"Something was wrong with unique field: {e}")
+        logger.error("Something was wrong with unique field: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User with that credentials already exists",
         )
     except Exception as e:
-        logger.warning(f"Something was wrong with the server: {e}")
+        logger.warning("Something was wrong with the server: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Something was wrong",
         )
+
+
+def parse_bulk_body(body: bytes, content_type: str) -> list:
+    if content_type.startswith("application/x-ndjson"):
+        return [orjson.loads(line) for line in body.splitlines() if line.strip()]
+    rows = orjson.loads(body)
+    if not isinstance(rows, list):
+        raise ValueError("Expected a JSON array of users")
+    return rows
+
+
+async def find_conflicts(users: list[UsersSchema.UserSignIn]) -> dict:
+    usernames = [user.username for user in users]
+    emails = [user.email for user in users]
+    existing = await database_definition.database.fetch_all(
+        user_cs.select()
+        .with_only_columns(user_cs.c.username, user_cs.c.email)
+        .where(user_cs.c.username.in_(usernames) | user_cs.c.email.in_(emails))
+    )
+    taken_usernames = {row["username"] for row in existing}
+    taken_emails = {row["email"] for row in existing}
+    return {
+        user.username: (
+            "username already exists"
+            if user.username in taken_usernames
+            else "email already exists"
+        )
+        for user in users
+        if user.username in taken_usernames or user.email in taken_emails
+    }
+
+
+async def register_batch(batch: list, results: list):
+    hashed = await hashing.hash_passwords([user.password for _, user in batch])
+    to_insert = [
+        {
+            **user.model_dump(),
+            "uuid": uuid.uuid4(),
+            "is_active": False,
+            "password": password,
+        }
+        for (_, user), password in zip(batch, hashed)
+    ]
+    async with database_definition.database.transaction():
+        inserted = await queries.insert_ignoring_conflicts(
+            user_cs, to_insert, user_cs.c.uuid
+        )
+        inserted_uuids = {row["uuid"] for row in inserted}
+        await jobs.enqueue_many(
+            "activation_email",
+            [
+                notifications.activation_payload(values)
+                for values in to_insert
+                if values["uuid"] in inserted_uuids
+            ],
+        )
+    skipped = [
+        user
+        for (_, user), values in zip(batch, to_insert)
+        if values["uuid"] not in inserted_uuids
+    ]
+    try:
+        # The rows were just written, so replicas may not have them yet.
+        with database_definition.database.primary():
+            conflicts = await find_conflicts(skipped) if skipped else {}
+    except Exception as e:
+        # The batch is committed; only the reason for each conflict is lost.
+        logger.warning("Something was wrong while finding conflicts: %s", e)
+        conflicts = {}
+    for (index, user), values in zip(batch, to_insert):
+        if values["uuid"] in inserted_uuids:
+            authorization.invalidate_user(user.username)
+            results[index] = UsersSchema.BulkRegisterResult(
+                index=index, username=user.username, status="created"
+            )
+        else:
+            results[index] = UsersSchema.BulkRegisterResult(
+                index=index,
+                username=user.username,
+                status="conflict",
+                detail=conflicts.get(user.username, "user already exists"),
+            )
+
+
+@router.post(
+    "/register/bulk",
+    response_model=UsersSchema.BulkRegisterResponse,
+    status_code=200,
+)
+async def create_users_in_bulk(request: Request):
+    try:
+        rows = parse_bulk_body(
+            await request.body(), request.headers.get("content-type", "")
+        )
+    except (orjson.JSONDecodeError, ValueError) as e:
+        logger.error("Something was wrong with the bulk payload: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Body must be a JSON array or NDJSON of users",
+        )
+    if len(rows) > BULK_REGISTER_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {BULK_REGISTER_MAX_ROWS} users per request",
+        )
+
+    results = [None] * len(rows)
+    valid = []
+    for index, row in enumerate(rows):
+        try:
+            valid.append((index, UsersSchema.UserSignIn.model_validate(row)))
+        except ValidationError as e:
+            username = row.get("username") if isinstance(row, dict) else None
+            results[index] = UsersSchema.BulkRegisterResult(
+                index=index,
+                username=username,
+                status="invalid",
+                detail="; ".join(
+                    f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                    for error in e.errors()
+                ),
+            )
+
+    for start in range(0, len(valid), BULK_REGISTER_BATCH_SIZE):
+        batch = valid[start : start + BULK_REGISTER_BATCH_SIZE]
+        try:
+            await register_batch(batch, results)
+        except Exception as e:
+            # Earlier batches are committed, so the caller gets their results
+            # and retries only the rows marked failed.
+            logger.warning("Something was wrong with the bulk registration: %s", e)
+            detail = e.detail if isinstance(e, HTTPException) else "Something was wrong"
+            for index, user in valid[start:]:
+                results[index] = UsersSchema.BulkRegisterResult(
+                    index=index, username=user.username, status="failed", detail=detail
+                )
+            break
+
+    statuses = [result.status for result in results if result is not None]
+    return UsersSchema.BulkRegisterResponse(
+        created=statuses.count("created"),
+        conflicts=statuses.count("conflict"),
+        invalid=statuses.count("invalid"),
+        failed=statuses.count("failed"),
+        results=[result for result in results if result is not None],
+    )
@@ -1,8 +1,16 @@
 from fastapi import APIRouter
 from resources import register
 from resources import login
+from resources import users
+from resources import internal
+from resources import complaints
+from resources import photos
 
 api_router = APIRouter()
 
 api_router.include_router(register.router)
 api_router.include_router(login.router)
+api_router.include_router(users.router)
+api_router.include_router(complaints.router)
+api_router.include_router(photos.router)
+api_router.include_router(internal.router)
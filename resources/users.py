@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, Request
+from typing import Annotated
+from schemas.general import UsersSchema
+from managers import authorization, conditional
+
+router = APIRouter(tags=["Users"])
+
+
+@router.get("/users/me/", response_model=UsersSchema.CurrentUser, status_code=200)
+async def get_current_user_information(
+    request: Request,
+    current_user: Annotated[
+        UsersSchema.CurrentUser, Depends(authorization.get_current_active_user)
+    ],
+):
+    # The user already comes from the auth cache, so a poll that has not
+    # changed costs no query and no serialization.
+    etag = conditional.make_etag(current_user.uuid, current_user.updated_at)
+    if conditional.matches(request, etag):
+        return conditional.not_modified(etag)
+    return conditional.json_response(current_user.model_dump(), etag)
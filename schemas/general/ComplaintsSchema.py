@@ -0,0 +1,61 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import Literal
+from models.enums_for_models import State
+import datetime
+import uuid
+
+
+class ComplaintIn(BaseModel):
+    title: str = Field(min_length=1, max_length=50)
+    description: str = Field(min_length=1)
+    amount: float = Field(ge=0)
+    photo_title: str | None = Field(default=None, max_length=50)
+    photo_description: str | None = None
+
+
+class ComplaintOut(BaseModel):
+    uuid: uuid.UUID
+    title: str
+    description: str
+    amount: float
+    photo_uuid: uuid.UUID
+    status: State
+    created_at: datetime.datetime
+    updated_at: datetime.datetime
+
+
+class ComplaintPage(BaseModel):
+    items: list[ComplaintOut]
+    next_cursor: str | None = None
+
+
+class ComplaintSearchHit(ComplaintOut):
+    rank: float
+
+
+class ComplaintSearchPage(BaseModel):
+    items: list[ComplaintSearchHit]
+    next_cursor: str | None = None
+
+
+class StatusTransitionIn(BaseModel):
+    uuids: list[uuid.UUID] = Field(min_length=1, max_length=5000)
+    status: State
+
+    @field_validator("status")
+    @classmethod
+    def status_is_a_decision(cls, value: State) -> State:
+        if value == State.pending:
+            raise ValueError("complaints can only move to approved or rejected")
+        return value
+
+
+class StatusTransitionResult(BaseModel):
+    uuid: uuid.UUID
+    outcome: Literal["updated", "not_pending", "not_found"]
+    status: State | None = None
+
+
+class StatusTransitionResponse(BaseModel):
+    updated: int
+    results: list[StatusTransitionResult]
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+import datetime
+import uuid
+
+
+class PhotoOut(BaseModel):
+    uuid: uuid.UUID
+    title: str
+    description: str
+    url: str
+    created_at: datetime.datetime
+    updated_at: datetime.datetime
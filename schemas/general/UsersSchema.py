@@ -1,5 +1,7 @@
 from pydantic import BaseModel, EmailStr
+from models.enums_for_models import RoleType
 import datetime
+import uuid
 
 
 class BaseUsers(BaseModel):
@@ -7,6 +9,13 @@ class BaseUsers(BaseModel):
     email: EmailStr
 
 
+class CurrentUser(BaseUsers):
+    uuid: uuid.UUID
+    role: RoleType
+    is_active: bool
+    updated_at: datetime.datetime
+
+
 class UserSignIn(BaseUsers):
     password: str
 
@@ -14,3 +23,18 @@ class UserSignIn(BaseUsers):
 class UserSignOut(BaseUsers):
     created_at: datetime.datetime
     updated_at: datetime.datetime
+
+
+class BulkRegisterResult(BaseModel):
+    index: int
+    username: str | None = None
+    status: str
+    detail: str | None = None
+
+
+class BulkRegisterResponse(BaseModel):
+    created: int
+    conflicts: int
+    invalid: int
+    failed: int = 0
+    results: list[BulkRegisterResult]
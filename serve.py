@@ -0,0 +1,83 @@
+import argparse
+import os
+import signal
+import socket
+import time
+import env_configuration
+
+WEB_WORKERS = int(env_configuration.config.get("WEB_WORKERS", os.cpu_count() or 1))
+WEB_HOST = env_configuration.config.get("WEB_HOST", "127.0.0.1")
+WEB_PORT = int(env_configuration.config.get("WEB_PORT", 8000))
+
+
+def bind(host: str, port: int) -> socket.socket:
+    sock = socket.create_server((host, port), backlog=2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def spawn(app, sock: socket.socket) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+    # Worker: drop the supervisor's handlers, uvicorn installs its own.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    exit_code = 1
+    try:
+        import uvicorn
+        import logger_config
+
+        logger_config.restart_listener()
+        config = uvicorn.Config(app, lifespan="on", log_config=None)
+        uvicorn.Server(config).run(sockets=[sock])
+        exit_code = 0
+    finally:
+        os._exit(exit_code)
+
+
+def serve(host: str, port: int, workers: int):
+    if workers > 1:
+        env_configuration.config.setdefault("CACHE_BACKEND", "shared")
+    # Preload: imports, routing tables and shared caches are built once here
+    # and inherited by every worker through fork().
+    import main
+    from logger_config import logger
+
+    sock = bind(host, port)
+    pids = {spawn(main.app, sock) for _ in range(workers)}
+    logger.warning("serving on %s:%s with %s workers", host, port, workers)
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in pids:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    while pids:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        pids.discard(pid)
+        if not stopping:
+            logger.warning(
+                "worker %s exited with %s, restarting",
+                pid,
+                os.waitstatus_to_exitcode(status),
+            )
+            time.sleep(1)
+            pids.add(spawn(main.app, sock))
+    sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run main.app in worker processes")
+    parser.add_argument("--host", default=WEB_HOST)
+    parser.add_argument("--port", type=int, default=WEB_PORT)
+    parser.add_argument("--workers", type=int, default=WEB_WORKERS)
+    args = parser.parse_args()
+    serve(args.host, args.port, max(1, args.workers))
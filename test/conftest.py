@@ -0,0 +1,52 @@
+import os
+import sys
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"
+    ),
+)
+
+import local_settings  # noqa: E402
+
+# Importing the app only needs configuration values, never a live database.
+local_settings.apply()
+
+import asyncio  # noqa: E402
+import contextlib  # noqa: E402
+import asyncpg  # noqa: E402
+import pytest  # noqa: E402
+import database_definition  # noqa: E402
+
+
+@pytest.fixture
+def max_queries():
+    # with max_queries(1): ... fails when the block, including requests sent
+    # through httpx's ASGI transport, issues more than one query.
+    @contextlib.contextmanager
+    def check(limit: int):
+        with database_definition.counting_queries() as counter:
+            yield counter
+        assert (
+            counter.count <= limit
+        ), f"{counter.count} queries issued, at most {limit} expected"
+
+    return check
+
+
+@pytest.fixture(scope="session")
+def live_database():
+    # For the few behaviours only Postgres can show (row locks, snapshots):
+    # runs against the local database from the README, skipped without one.
+    async def reachable():
+        connection = await asyncpg.connect(
+            str(database_definition.database.url), timeout=2
+        )
+        await connection.close()
+
+    try:
+        asyncio.run(reachable())
+    except (OSError, asyncio.TimeoutError, asyncpg.PostgresError) as e:
+        pytest.skip(f"no local postgres: {e}")
+    return database_definition.database
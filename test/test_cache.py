@@ -0,0 +1,64 @@
+import multiprocessing
+from managers.cache import SharedTTLCache, TTLCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=4, ttl=10, timer=timer)
+    cache.set("jano", {"username": "jano"})
+    assert cache.get("jano") == {"username": "jano"}
+    timer.now = 10
+    assert cache.get("jano") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_invalidate_removes_entry():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_shared_cache_is_visible_across_forked_workers():
+    cache = SharedTTLCache(maxsize=8, ttl=60)
+    cache.set("stale", 1)
+    worker = multiprocessing.get_context("fork").Process(
+        target=lambda: (cache.set("jano", {"role": "admin"}), cache.invalidate("stale"))
+    )
+    worker.start()
+    worker.join()
+    assert cache.get("jano") == {"role": "admin"}
+    assert cache.get("stale") is None
+
+
+def test_shared_cache_expires_and_skips_oversized_values():
+    timer = FakeTimer()
+    cache = SharedTTLCache(maxsize=4, ttl=10, slot_size=128, timer=timer)
+    cache.set("a", 1)
+    cache.set("big", "x" * 1000)
+    assert cache.get("a") == 1
+    assert cache.get("big") is None
+    timer.now = 10
+    assert cache.get("a") is None
+    assert len(cache) == 0
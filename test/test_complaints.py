@@ -0,0 +1,205 @@
+import asyncio
+import datetime
+import uuid
+import asyncpg
+import databases
+import httpx
+import pytest
+from asyncpg import UniqueViolationError
+import main
+from managers import authorization, complaints, storage, uploads
+from models.enums_for_models import RoleType, State
+from schemas.general import ComplaintsSchema, UsersSchema
+
+USER = UsersSchema.CurrentUser(
+    uuid=uuid.uuid4(),
+    username="ana",
+    email="ana@example.com",
+    role=RoleType.user,
+    is_active=True,
+    updated_at=datetime.datetime(2026, 1, 1),
+)
+
+
+@pytest.fixture
+def stored(tmp_path, monkeypatch):
+    backend = storage.LocalStorage(str(tmp_path))
+    monkeypatch.setattr(uploads, "storage", backend)
+
+    async def fetch_val(self, query, values=None, column=0):
+        # No photo row references the stored key.
+        return None
+
+    monkeypatch.setattr(databases.Database, "fetch_val", fetch_val)
+    monkeypatch.setitem(
+        main.app.dependency_overrides,
+        authorization.get_current_active_user,
+        lambda: USER,
+    )
+    # Files left under the storage root once the request is over.
+    return lambda: [path for path in backend.root.rglob("*") if path.is_file()]
+
+
+def post_complaint(data: dict, image: bytes = b"\x89PNG pothole"):
+    async def request():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            return await c.post(
+                "/complaints/",
+                data=data,
+                files={"photo": ("hole.png", image, "image/png")},
+            )
+
+    return asyncio.run(request())
+
+
+def test_invalid_fields_remove_the_stored_photo(stored):
+    response = post_complaint({"title": "Pothole", "description": "Deep"})
+    assert response.status_code == 422
+    assert response.json()["detail"] == "amount: Field required"
+    assert stored() == []
+
+
+def test_unique_violation_removes_the_stored_photo(stored, monkeypatch):
+    async def create_complaint(user_uuid, values, photo_values):
+        raise UniqueViolationError("photos_title_key")
+
+    monkeypatch.setattr(complaints, "create_complaint", create_complaint)
+    response = post_complaint(
+        {"title": "Pothole", "description": "Deep", "amount": "5"}
+    )
+    assert response.status_code == 400
+    assert stored() == []
+
+
+def test_created_complaint_keeps_its_photo(stored, monkeypatch):
+    sent = []
+
+    async def create_complaint(user_uuid, values, photo_values):
+        sent.append(photo_values)
+        now = datetime.datetime(2026, 1, 1)
+        return {
+            "uuid": uuid.uuid4(),
+            "photo_uuid": uuid.uuid4(),
+            "status": State.pending,
+            "created_at": now,
+            "updated_at": now,
+            **values,
+        }
+
+    monkeypatch.setattr(complaints, "create_complaint", create_complaint)
+    response = post_complaint(
+        {"title": "Pothole", "description": "Deep", "amount": "5"}
+    )
+    assert response.status_code == 201
+    [photo_values] = sent
+    assert [path.name for path in stored()] == [photo_values["url"].rsplit("/")[-1]]
+
+
+def test_default_photo_values_differ_per_image():
+    complaint_in = ComplaintsSchema.ComplaintIn(
+        title="x" * 50, description="Deep", amount=5
+    )
+    first, second = (
+        complaints.photo_values(
+            complaint_in, uploads.StoredImage(f"sha256/{d[:2]}/{d}.png", True)
+        )
+        for d in ("ab" * 32, "cd" * 32)
+    )
+    assert first["title"] != second["title"]
+    assert first["description"] != second["description"]
+    assert len(first["title"]) == 50
+    assert first["title"].endswith(" (abababababab)")
+    assert first["description"] == "Deep (abababababab)"
+
+
+def test_explicit_photo_values_are_kept():
+    complaint_in = ComplaintsSchema.ComplaintIn(
+        title="Pothole",
+        description="Deep",
+        amount=5,
+        photo_title="Corner of 5th",
+        photo_description="Taken at night",
+    )
+    values = complaints.photo_values(
+        complaint_in, uploads.StoredImage("sha256/ab/ab.png", True)
+    )
+    assert values == {
+        "title": "Corner of 5th",
+        "description": "Taken at night",
+        "url": "sha256/ab/ab.png",
+    }
+
+
+def test_concurrent_identical_photo_is_reused(live_database):
+    # Another request stores the same content and commits while this
+    # statement waits on its uncommitted row; the statement's snapshot
+    # predates that commit, yet the complaint must still get the photo.
+    name = f"cc{uuid.uuid4().hex[:8]}"
+    key = f"sha256/{name[:2]}/{name}.png"
+    user_uuid, photo_uuid = uuid.uuid4(), uuid.uuid4()
+    values = {"title": name, "description": name, "amount": 1}
+    photo_values = {"title": f"{name} b", "description": f"{name} b", "url": key}
+
+    async def scenario():
+        await live_database.connect()
+        other = await asyncpg.connect(str(live_database.url))
+        try:
+            await other.execute(
+                "INSERT INTO users_cs (uuid, username, email, password, is_active)"
+                " VALUES ($1, $2, $3, 'x', true)",
+                user_uuid,
+                name,
+                f"{name}@example.com",
+            )
+            transaction = other.transaction()
+            await transaction.start()
+            await other.execute(
+                "INSERT INTO photos (uuid, title, description, url)"
+                " VALUES ($1, $2, $3, $4)",
+                photo_uuid,
+                f"{name} a",
+                f"{name} a",
+                key,
+            )
+            create = asyncio.create_task(
+                complaints.create_complaint(user_uuid, values, photo_values)
+            )
+            await asyncio.sleep(0.2)
+            assert not create.done()
+            await transaction.commit()
+            return await asyncio.wait_for(create, 5)
+        finally:
+            if other.is_in_transaction():
+                await transaction.rollback()
+            await other.execute(
+                "DELETE FROM users_cs_complaint WHERE user_uuid = $1", user_uuid
+            )
+            await other.execute("DELETE FROM complaints WHERE title = $1", name)
+            await other.execute("DELETE FROM photos WHERE url = $1", key)
+            await other.execute("DELETE FROM users_cs WHERE uuid = $1", user_uuid)
+            await other.close()
+            await live_database.disconnect()
+
+    row = asyncio.run(scenario())
+    assert row["photo_uuid"] == photo_uuid
+    # The photo was not inserted by this statement, so no thumbnail job.
+    assert row["thumbnail_jobs"] == 0
+
+
+def test_failed_request_keeps_a_photo_a_concurrent_request_stored(stored, monkeypatch):
+    # This request renamed the object into place, but a concurrent request
+    # with the same image committed its photo row first.
+    async def fetch_val(self, query, values=None, column=0):
+        return uuid.uuid4()
+
+    async def create_complaint(user_uuid, values, photo_values):
+        raise UniqueViolationError("photos_title_key")
+
+    monkeypatch.setattr(databases.Database, "fetch_val", fetch_val)
+    monkeypatch.setattr(complaints, "create_complaint", create_complaint)
+    response = post_complaint(
+        {"title": "Pothole", "description": "Deep", "amount": "5"}
+    )
+    assert response.status_code == 400
+    assert len(stored()) == 1
@@ -0,0 +1,29 @@
+import datetime
+import uuid
+from starlette.requests import Request
+from managers import conditional
+
+
+def make_request(if_none_match: str | None) -> Request:
+    headers = []
+    if if_none_match is not None:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+def test_etag_changes_with_updated_at():
+    row_uuid = uuid.uuid4()
+    updated_at = datetime.datetime(2026, 1, 1, 12, 0)
+    etag = conditional.make_etag(row_uuid, updated_at)
+    assert etag == conditional.make_etag(row_uuid, updated_at)
+    assert etag != conditional.make_etag(
+        row_uuid, updated_at + datetime.timedelta(microseconds=1)
+    )
+
+
+def test_if_none_match_uses_weak_comparison():
+    etag = conditional.make_etag("a")
+    assert conditional.matches(make_request(f'"other", W/{etag}'), etag)
+    assert conditional.matches(make_request("*"), etag)
+    assert not conditional.matches(make_request('"other"'), etag)
+    assert not conditional.matches(make_request(None), etag)
@@ -0,0 +1,41 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from managers import hashing
+
+
+def test_hash_and_check_password_in_executor(monkeypatch):
+    monkeypatch.setattr(hashing, "HASH_EXECUTOR", "thread")
+    monkeypatch.setattr(hashing, "_executor", None)
+
+    async def run():
+        hashed = await hashing.hash_password("secret")
+        return hashed, await hashing.check_password("secret", hashed)
+
+    hashed, verified = asyncio.run(run())
+    hashing.shutdown_executor()
+    assert hashed != "secret"
+    assert verified
+    assert hashing.stats["queue_depth"] == 0
+
+
+def test_full_queue_is_rejected(monkeypatch):
+    monkeypatch.setattr(hashing, "HASH_QUEUE_SIZE", 0)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(hashing.hash_password("secret"))
+    assert error.value.status_code == 503
+
+
+def test_hashes_at_another_cost_need_update():
+    current = hashing.get_password_hash("secret")
+    other_cost = 4 if hashing.BCRYPT_ROUNDS != 4 else 5
+    stale = hashing.pwd_context.handler("bcrypt").using(rounds=other_cost).hash("x")
+    assert hashing.hash_cost(current) == hashing.BCRYPT_ROUNDS
+    assert not hashing.needs_update(current)
+    assert hashing.needs_update(stale)
+
+
+def test_calibration_stops_after_the_budget():
+    rounds, timings = hashing.calibrate(budget_seconds=0.0, samples=1)
+    assert rounds == 4
+    assert list(timings) == [4]
@@ -0,0 +1,141 @@
+import asyncio
+import httpx
+from fastapi import FastAPI, Request
+from managers import idempotency
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(idempotency.IdempotencyMiddleware)
+    app.state.calls = 0
+
+    @app.post("/things/", status_code=201)
+    async def create_thing(request: Request):
+        app.state.calls += 1
+        await asyncio.sleep(0.05)
+        return {"call": app.state.calls, "body": await request.json()}
+
+    return app
+
+
+async def post(client, key, payload):
+    return await client.post("/things/", json=payload, headers={"Idempotency-Key": key})
+
+
+def run(app, scenario):
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            return await scenario(c)
+
+    idempotency.responses.clear()
+    return asyncio.run(main())
+
+
+def test_retry_replays_the_stored_response():
+    app = make_app()
+
+    async def scenario(client):
+        first = await post(client, "k1", {"name": "a"})
+        second = await post(client, "k1", {"name": "a"})
+        return first, second
+
+    first, second = run(app, scenario)
+    assert app.state.calls == 1
+    assert second.status_code == first.status_code == 201
+    assert second.json() == first.json()
+    assert second.headers["idempotent-replayed"] == "true"
+
+
+def test_key_reused_with_another_body_is_rejected():
+    app = make_app()
+
+    async def scenario(client):
+        await post(client, "k2", {"name": "a"})
+        return await post(client, "k2", {"name": "b"})
+
+    assert run(app, scenario).status_code == 422
+    assert app.state.calls == 1
+
+
+def test_concurrent_duplicates_share_one_execution():
+    app = make_app()
+
+    async def scenario(client):
+        return await asyncio.gather(*(post(client, "k3", {"n": 1}) for _ in range(5)))
+
+    responses = run(app, scenario)
+    assert app.state.calls == 1
+    assert {response.json()["call"] for response in responses} == {1}
+
+
+def make_form_app():
+    app = FastAPI()
+    app.add_middleware(idempotency.IdempotencyMiddleware)
+    app.state.calls = 0
+
+    @app.post("/photos/", status_code=201)
+    async def upload(request: Request):
+        app.state.calls += 1
+        return {"call": app.state.calls, "size": len(await request.body())}
+
+    return app
+
+
+def form(boundary: str, image: bytes) -> bytes:
+    return (
+        (
+            f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="title"\r\n\r\nPothole\r\n'
+            f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="photo"; filename="hole.png"\r\n'
+            "Content-Type: image/png\r\n\r\n"
+        ).encode()
+        + image
+        + f"\r\n--{boundary}--\r\n".encode()
+    )
+
+
+async def post_form(client, key, boundary, image):
+    return await client.post(
+        "/photos/",
+        content=form(boundary, image),
+        headers={
+            "Idempotency-Key": key,
+            "Content-Type": f"multipart/form-data; boundary={boundary}",
+        },
+    )
+
+
+def test_multipart_retry_with_a_fresh_boundary_is_replayed():
+    app = make_form_app()
+
+    async def scenario(client):
+        first = await post_form(client, "k4", "a1b2c3d4", b"\x89PNG pothole")
+        retry = await post_form(client, "k4", "e5f6a7b8e5f6", b"\x89PNG pothole")
+        other = await post_form(client, "k4", "0c0c0c0c", b"\x89PNG other")
+        return first, retry, other
+
+    first, retry, other = run(app, scenario)
+    assert app.state.calls == 1
+    assert retry.status_code == 201
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == first.json()
+    assert other.status_code == 422
+
+
+def test_multipart_digest_does_not_depend_on_chunking():
+    def fingerprint(boundary, chunk_size):
+        scope = {"method": "POST", "path": "/photos/"}
+        headers = {
+            b"content-type": f"multipart/form-data; boundary={boundary}".encode()
+        }
+        digest = idempotency.request_digest(scope, headers)
+        body = form(boundary, b"\x89PNG" * 20)
+        for i in range(0, len(body), chunk_size):
+            digest.update(body[i : i + chunk_size])
+        return digest.digest()
+
+    expected = fingerprint("boundary", len(form("boundary", b"")) * 4)
+    for boundary, chunk_size in [("boundary", 3), ("b0undary-xyz", 5), ("q", 1)]:
+        assert fingerprint(boundary, chunk_size) == expected
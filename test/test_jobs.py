@@ -0,0 +1,166 @@
+import asyncio
+import datetime
+import databases
+import pytest
+from sqlalchemy.dialects import postgresql
+from managers import jobs
+
+
+def test_backoff_grows_and_is_capped():
+    assert jobs.JOB_BACKOFF_BASE / 2 <= jobs.backoff(1) <= jobs.JOB_BACKOFF_BASE
+    assert jobs.backoff(3) <= jobs.JOB_BACKOFF_BASE * 4
+    assert jobs.backoff(100) <= jobs.JOB_BACKOFF_MAX
+
+
+def test_side_effect_handlers_are_registered():
+    import main  # noqa: F401
+
+    assert {"activation_email", "thumbnail"} <= set(jobs.handlers)
+
+
+CLAIMED_AT = datetime.datetime(2026, 1, 1, 12, 0, 0, 123456)
+
+
+def claimed_row(attempts: int = 1, max_attempts: int = 5):
+    return {
+        "id": 7,
+        "kind": "test",
+        "payload": {"n": 1},
+        "attempts": attempts,
+        "max_attempts": max_attempts,
+        "locked_at": CLAIMED_AT,
+        "waited": 0.5,
+    }
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    # Statements the job queue sends, compiled the way asyncpg would get them.
+    statements = []
+
+    async def execute(self, query, values=None):
+        statements.append(query.compile(dialect=postgresql.dialect()))
+
+    async def fetch_all(self, query, values=None):
+        statements.append(query.compile(dialect=postgresql.dialect()))
+        return []
+
+    monkeypatch.setattr(databases.Database, "execute", execute)
+    monkeypatch.setattr(databases.Database, "fetch_all", fetch_all)
+    return statements
+
+
+def assert_held_claim(statement):
+    # Only the claim this worker still holds may be finished or reset.
+    assert str(statement).endswith(
+        "WHERE jobs.id = %(id_1)s AND jobs.status = %(status_1)s"
+        " AND jobs.locked_at = %(locked_at_1)s"
+    )
+    assert statement.params["id_1"] == 7
+    assert statement.params["status_1"] == "running"
+    assert statement.params["locked_at_1"] == CLAIMED_AT
+
+
+def test_claim_skips_locked_and_exhausted_jobs(sent):
+    asyncio.run(jobs.claim(3))
+    [statement] = sent
+    sql = str(statement)
+    assert sql.startswith("UPDATE jobs SET status=%(status)s")
+    assert "jobs.attempts < jobs.max_attempts" in sql
+    assert "LIMIT %(param_1)s FOR UPDATE SKIP LOCKED)" in sql
+    assert "jobs.locked_at, EXTRACT(epoch" in sql.split("RETURNING")[1]
+    assert statement.params["param_1"] == 3
+
+
+def test_failed_attempt_is_retried_with_backoff(sent):
+    outcome = asyncio.run(jobs.fail(claimed_row(attempts=2), "ValueError: bad"))
+    [statement] = sent
+    assert outcome == "queued"
+    assert "run_at=(now() + %(now_1)s)" in str(statement)
+    assert statement.params["status"] == "queued"
+    assert statement.params["last_error"] == "ValueError: bad"
+    assert statement.params["now_1"] <= datetime.timedelta(
+        seconds=jobs.JOB_BACKOFF_BASE * 2
+    )
+    assert_held_claim(statement)
+
+
+def test_last_attempt_fails_the_job(sent):
+    outcome = asyncio.run(jobs.fail(claimed_row(attempts=5), "ValueError: bad"))
+    [statement] = sent
+    assert outcome == "failed"
+    assert "run_at" not in str(statement)
+    assert statement.params["status"] == "failed"
+    assert_held_claim(statement)
+
+
+def test_stale_jobs_are_requeued_unless_exhausted(sent):
+    asyncio.run(jobs.requeue_stale())
+    [statement] = sent
+    sql = str(statement)
+    assert sql.startswith(
+        "UPDATE jobs SET status=CASE WHEN (jobs.attempts >= jobs.max_attempts)"
+        " THEN %(param_1)s ELSE %(param_2)s END"
+    )
+    assert sql.endswith(
+        "WHERE jobs.status = %(status_1)s"
+        " AND jobs.locked_at < now() - CAST(%(param_4)s AS INTERVAL)"
+    )
+    assert (statement.params["param_1"], statement.params["param_2"]) == (
+        "failed",
+        "queued",
+    )
+    assert statement.params["param_4"] == datetime.timedelta(
+        seconds=jobs.JOB_LOCK_TIMEOUT
+    )
+
+
+def run_job(monkeypatch, func):
+    monkeypatch.setitem(jobs.handlers, "test", func)
+    asyncio.run(jobs.JobRunner(1, 1)._execute(claimed_row()))
+
+
+def test_finished_job_is_deleted(sent, monkeypatch):
+    payloads = []
+
+    async def func(payload):
+        payloads.append(payload)
+
+    run_job(monkeypatch, func)
+    [statement] = sent
+    assert payloads == [{"n": 1}]
+    assert str(statement).startswith("DELETE FROM jobs")
+    assert_held_claim(statement)
+
+
+def test_failing_job_is_retried(sent, monkeypatch):
+    async def func(payload):
+        raise ValueError("bad")
+
+    run_job(monkeypatch, func)
+    [statement] = sent
+    assert statement.params["status"] == "queued"
+    assert statement.params["last_error"] == "ValueError: bad"
+    assert_held_claim(statement)
+
+
+def test_cancelled_job_gets_its_attempt_back(sent, monkeypatch):
+    started = asyncio.Event()
+
+    async def func(payload):
+        started.set()
+        await asyncio.Event().wait()
+
+    async def scenario():
+        monkeypatch.setitem(jobs.handlers, "test", func)
+        task = asyncio.create_task(jobs.JobRunner(1, 1)._execute(claimed_row()))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    [statement] = sent
+    assert "attempts=(jobs.attempts - %(attempts_1)s)" in str(statement)
+    assert statement.params["status"] == "queued"
+    assert_held_claim(statement)
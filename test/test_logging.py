@@ -0,0 +1,28 @@
+import logging
+import orjson
+from fastapi.testclient import TestClient
+from main import app
+import logger_config
+
+client = TestClient(app)
+
+
+def test_request_id_is_echoed_or_generated():
+    response = client.get("/users/me/", headers={"X-Request-ID": "abc123"})
+    assert response.headers["x-request-id"] == "abc123"
+    assert len(client.get("/users/me/").headers["x-request-id"]) == 32
+
+
+def test_json_formatter_includes_request_id():
+    token = logger_config.request_id.set("abc123")
+    try:
+        record = logging.LogRecord(
+            "app", logging.ERROR, __file__, 1, "failed: %s", ("x",), None
+        )
+        logger_config.RequestIdFilter().filter(record)
+    finally:
+        logger_config.request_id.reset(token)
+    entry = orjson.loads(logger_config.JsonFormatter().format(record))
+    assert entry["message"] == "failed: x"
+    assert entry["request_id"] == "abc123"
+    assert entry["level"] == "ERROR"
@@ -1,10 +1,38 @@
 from fastapi.testclient import TestClient
-from ..main import app
+from main import app
 
 client = TestClient(app)
 
 
-def test_get_books():
-    response = client.get("/books/")
-    assert response.status_code == 200
-    assert response.json() == []
+def test_register_rejects_invalid_payload():
+    response = client.post("/register/", json={"username": "jano"})
+    assert response.status_code == 422
+
+
+def test_current_user_requires_token():
+    response = client.get("/users/me/")
+    assert response.status_code == 401
+
+
+def test_complaint_transitions_require_token():
+    response = client.post(
+        "/complaints/status/",
+        json={"uuids": ["00000000-0000-0000-0000-000000000000"], "status": "approved"},
+    )
+    assert response.status_code == 401
+
+
+def test_complaint_create_requires_token():
+    response = client.post("/complaints/", data={"title": "Pothole"})
+    assert response.status_code == 401
+
+
+def test_pool_statistics_require_token():
+    response = client.get("/internal/pool/")
+    assert response.status_code == 401
+
+
+def test_photo_downloads_require_token():
+    photo_uuid = "00000000-0000-0000-0000-000000000000"
+    assert client.get(f"/photos/{photo_uuid}/content").status_code == 401
+    assert client.get(f"/photos/{photo_uuid}/thumbnail").status_code == 401
@@ -0,0 +1,66 @@
+from fastapi.testclient import TestClient
+from main import app
+import asyncio
+import databases
+from managers import authentication, authorization, metrics
+import database_definition
+from models.user_cs import user_cs
+
+client = TestClient(app)
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("test_seconds", "Test latency", ("route",), (0.1, 1))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    lines = histogram.render()
+    assert 'test_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/a",le="+Inf"} 2' in lines
+    assert 'test_seconds_count{route="/a"} 2' in lines
+
+
+def test_metrics_endpoint_reports_route_labels(monkeypatch):
+    monkeypatch.setattr(authorization, "METRICS_TOKEN", "scrape-secret")
+    monkeypatch.setattr(authentication, "refresh_hash_population", lambda: None)
+    client.get("/users/me/")
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+    assert (
+        'http_requests_total{method="GET",route="/users/me/",status="401"}'
+        in response.text
+    )
+
+
+def test_query_shape_uses_statement_and_table():
+    query = user_cs.select().where(user_cs.c.username == "jano")
+    assert database_definition.query_shape(query) == "select users_cs"
+    assert database_definition.query_shape(user_cs.insert()) == "insert users_cs"
+
+
+def test_metrics_endpoint_requires_the_scrape_token(monkeypatch):
+    monkeypatch.setattr(authorization, "METRICS_TOKEN", "")
+    assert client.get("/metrics").status_code == 404
+    monkeypatch.setattr(authorization, "METRICS_TOKEN", "scrape-secret")
+    assert client.get("/metrics").status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer wrong"})
+    assert response.status_code == 401
+
+
+def test_hash_population_is_counted_once_per_interval(monkeypatch):
+    counts = []
+
+    async def fetch_all(self, query, values=None):
+        counts.append(query)
+        return [{"cost": "12", "users": 3}]
+
+    monkeypatch.setattr(databases.Database, "fetch_all", fetch_all)
+    monkeypatch.setattr(authentication, "_population_refreshed_at", float("-inf"))
+
+    async def scrapes():
+        authentication.refresh_hash_population()
+        authentication.refresh_hash_population()
+        await asyncio.gather(*authentication._population_counts)
+
+    asyncio.run(scrapes())
+    assert len(counts) == 1
+    assert 'password_hash_population{cost="12"} 3' in metrics.REGISTRY.render()
@@ -0,0 +1,25 @@
+import datetime
+import uuid
+import pytest
+from fastapi import HTTPException
+from managers import pagination
+
+
+def test_cursor_round_trip():
+    created_at = datetime.datetime(2026, 1, 1, 12, 30, 15, 123456)
+    row_uuid = uuid.uuid4()
+    cursor = pagination.encode_cursor(created_at, row_uuid)
+    assert pagination.decode_cursor(cursor) == (created_at, row_uuid)
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        pagination.decode_cursor("not-a-cursor")
+    assert error.value.status_code == 400
+
+
+def test_search_cursor_keeps_rank_exact():
+    rank = 0.0607927106320858
+    row_uuid = uuid.uuid4()
+    cursor = pagination.encode_search_cursor(rank, row_uuid)
+    assert pagination.decode_search_cursor(cursor) == (rank, row_uuid)
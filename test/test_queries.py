@@ -0,0 +1,37 @@
+import asyncio
+import uuid
+import databases
+from sqlalchemy.dialects import postgresql
+from managers import queries
+from models.user_cs import user_cs
+
+
+def sent_sql(monkeypatch, *columns) -> str:
+    sent = []
+
+    async def fetch_one(self, query, values=None):
+        sent.append(query)
+        return {"username": "ana"}
+
+    monkeypatch.setattr(databases.Database, "fetch_one", fetch_one)
+    row = asyncio.run(
+        queries.insert_returning(
+            user_cs, {"uuid": uuid.uuid4(), "username": "ana"}, *columns
+        )
+    )
+    assert row == {"username": "ana"}
+    [query] = sent
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+def test_insert_returning_is_one_statement(monkeypatch):
+    sql = sent_sql(monkeypatch)
+    assert sql.startswith("INSERT INTO users_cs (uuid, username")
+    assert sql.endswith(
+        " RETURNING " + ", ".join(f"users_cs.{column.name}" for column in user_cs.c)
+    )
+
+
+def test_insert_returning_limits_columns(monkeypatch):
+    sql = sent_sql(monkeypatch, user_cs.c.uuid, user_cs.c.created_at)
+    assert sql.endswith(" RETURNING users_cs.uuid, users_cs.created_at")
@@ -0,0 +1,58 @@
+import asyncio
+import datetime
+import uuid
+import databases
+import httpx
+from fastapi import FastAPI
+import database_definition
+import main
+from managers import authentication, authorization
+
+
+def get(app, url: str, **kwargs):
+    async def request():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            return await c.get(url, **kwargs)
+
+    return asyncio.run(request())
+
+
+def test_header_reports_queries_of_the_request(monkeypatch):
+    async def fetch_val(self, query, values=None, column=0):
+        return 1
+
+    monkeypatch.setattr(databases.Database, "fetch_val", fetch_val)
+    app = FastAPI()
+    app.add_middleware(database_definition.QueryCountMiddleware)
+
+    @app.get("/twice/")
+    async def twice():
+        await database_definition.database.fetch_val("SELECT 1")
+        await database_definition.database.fetch_val("SELECT 1")
+        return {}
+
+    assert get(app, "/twice/").headers["x-db-queries"] == "2"
+    assert get(app, "/docs").headers["x-db-queries"] == "0"
+
+
+def test_cached_current_user_costs_no_query(max_queries):
+    username = f"qc{uuid.uuid4().hex[:8]}"
+    authorization.user_cache.set(
+        username,
+        {
+            "uuid": uuid.uuid4(),
+            "username": username,
+            "email": f"{username}@example.com",
+            "role": "user",
+            "is_active": True,
+            "updated_at": datetime.datetime(2026, 1, 1),
+        },
+    )
+    token = authentication.create_access_token({"sub": username})
+    with max_queries(0):
+        response = get(
+            main.app, "/users/me/", headers={"Authorization": f"Bearer {token}"}
+        )
+    assert response.status_code == 200
+    assert response.json()["username"] == username
@@ -0,0 +1,72 @@
+import asyncio
+from managers import query_plans
+
+
+def scan(node_type: str, estimated: int, actual: int, removed: int = 0, **extra):
+    return {
+        "Node Type": node_type,
+        "Relation Name": "complaints",
+        "Plan Rows": estimated,
+        "Actual Rows": actual,
+        "Actual Loops": 1,
+        "Rows Removed by Filter": removed,
+        **extra,
+    }
+
+
+def test_large_seq_scan_is_reported():
+    plan = {"Plan": scan("Seq Scan", 5, 3, removed=50000, Filter="(photo_uuid = $1)")}
+    [finding] = query_plans.plan_findings(plan)
+    assert finding.kind == "seq_scan"
+    assert finding.relation == "complaints"
+    assert "read 50003 rows" in finding.detail
+
+
+def test_small_seq_scan_is_ignored():
+    plan = {"Plan": scan("Seq Scan", 10, 10, removed=20)}
+    assert query_plans.plan_findings(plan) == []
+
+
+def test_scan_stopped_by_limit_is_not_a_misestimate():
+    index_scan = scan("Index Scan", 50000, 21)
+    plan = {
+        "Plan": {
+            "Node Type": "Limit",
+            "Plan Rows": 21,
+            "Actual Rows": 21,
+            "Actual Loops": 1,
+            "Plans": [index_scan],
+        }
+    }
+    assert query_plans.plan_findings(plan) == []
+    [finding] = query_plans.plan_findings({"Plan": index_scan})
+    assert finding.kind == "misestimate"
+
+
+def test_estimated_plan_reports_seq_scans():
+    plan = {
+        "Plan": {
+            "Node Type": "Seq Scan",
+            "Relation Name": "users_cs_complaint",
+            "Plan Rows": 2000,
+        }
+    }
+    [finding] = query_plans.plan_findings(plan)
+    assert finding.relation == "users_cs_complaint"
+
+
+def test_recording_sees_queries_and_restores_methods():
+    class Database:
+        async def fetch_one(self, query, values=None):
+            return query
+
+        fetch_all = fetch_val = execute = execute_many = iterate = fetch_one
+
+    database = Database()
+    with query_plans.recording(database) as recorded:
+        with query_plans.label("GET /users/me/"):
+            assert asyncio.run(database.fetch_one("SELECT 1")) == "SELECT 1"
+    assert recorded == [
+        query_plans.RecordedQuery("GET /users/me/", "fetch_one", "SELECT 1", None)
+    ]
+    assert "fetch_one" not in vars(database)
@@ -0,0 +1,63 @@
+import asyncio
+import httpx
+from fastapi import FastAPI, Request
+from managers import ranges
+
+CONTENT = bytes(range(256)) * 4
+
+
+def get(tmp_path, headers: dict, name: str = "photo.bin"):
+    (tmp_path / "photo.bin").write_bytes(CONTENT)
+    app = FastAPI()
+
+    @app.get("/file")
+    async def download(request: Request):
+        return ranges.file_response(request, tmp_path / name, etag='"abc"')
+
+    async def request():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            return await c.get("/file", headers=headers)
+
+    return asyncio.run(request())
+
+
+def test_without_range_the_whole_file_is_sent(tmp_path):
+    response = get(tmp_path, {})
+    assert response.status_code == 200
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.content == CONTENT
+
+
+def test_single_range(tmp_path):
+    response = get(tmp_path, {"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 10-19/{len(CONTENT)}"
+    assert response.headers["content-length"] == "10"
+    assert response.content == CONTENT[10:20]
+
+
+def test_open_and_suffix_ranges(tmp_path):
+    response = get(tmp_path, {"Range": "bytes=1000-"})
+    assert response.content == CONTENT[1000:]
+    response = get(tmp_path, {"Range": "bytes=-16"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == (
+        f"bytes {len(CONTENT) - 16}-{len(CONTENT) - 1}/{len(CONTENT)}"
+    )
+    assert response.content == CONTENT[-16:]
+
+
+def test_unsatisfiable_range(tmp_path):
+    response = get(tmp_path, {"Range": f"bytes={len(CONTENT)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+
+def test_missing_stored_file_is_not_found(tmp_path):
+    assert get(tmp_path, {}, name="gone.bin").status_code == 404
+
+
+def test_matching_etag_is_not_modified(tmp_path):
+    response = get(tmp_path, {"If-None-Match": '"abc"', "Range": "bytes=0-1"})
+    assert response.status_code == 304
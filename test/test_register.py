@@ -0,0 +1,132 @@
+import asyncio
+import contextlib
+import databases
+import httpx
+import orjson
+import pytest
+from fastapi import HTTPException
+import database_definition
+import main
+from managers import hashing, jobs, queries
+from resources import register
+
+TAKEN = {"taken"}
+
+
+def user(name: str) -> dict:
+    return {"username": name, "email": f"{name}@example.com", "password": "secret"}
+
+
+@pytest.fixture
+def fake_database(monkeypatch):
+    # Users in TAKEN already exist; everything else is inserted.
+    inserted = []
+
+    async def hash_passwords(passwords):
+        return [f"hashed {password}" for password in passwords]
+
+    async def insert_ignoring_conflicts(table, rows, *columns):
+        created = [row for row in rows if row["username"] not in TAKEN]
+        inserted.extend(created)
+        return [{"uuid": row["uuid"]} for row in created]
+
+    async def fetch_all(self, query, values=None):
+        return [{"username": name, "email": f"{name}@example.com"} for name in TAKEN]
+
+    async def enqueue_many(kind, payloads):
+        pass
+
+    @contextlib.asynccontextmanager
+    async def transaction():
+        yield
+
+    monkeypatch.setattr(hashing, "hash_passwords", hash_passwords)
+    monkeypatch.setattr(queries, "insert_ignoring_conflicts", insert_ignoring_conflicts)
+    monkeypatch.setattr(databases.Database, "fetch_all", fetch_all)
+    monkeypatch.setattr(jobs, "enqueue_many", enqueue_many)
+    monkeypatch.setattr(database_definition.database, "transaction", transaction)
+    return inserted
+
+
+def post_bulk(body: bytes, content_type: str):
+    async def request():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            return await c.post(
+                "/register/bulk", content=body, headers={"Content-Type": content_type}
+            )
+
+    return asyncio.run(request())
+
+
+@pytest.mark.parametrize(
+    "encode, content_type",
+    [
+        (orjson.dumps, "application/json"),
+        (lambda rows: b"\n".join(map(orjson.dumps, rows)), "application/x-ndjson"),
+    ],
+)
+def test_json_array_and_ndjson_register_the_same_rows(
+    fake_database, encode, content_type
+):
+    response = post_bulk(encode([user("ana"), user("luis")]), content_type)
+    assert response.status_code == 200
+    assert response.json()["created"] == 2
+    assert [row["username"] for row in fake_database] == ["ana", "luis"]
+    assert fake_database[0]["password"] == "hashed secret"
+
+
+def test_each_row_reports_its_own_outcome(fake_database):
+    rows = [user("ana"), user("taken"), {"username": "no-email"}]
+    body = post_bulk(orjson.dumps(rows), "application/json").json()
+    assert (body["created"], body["conflicts"], body["invalid"]) == (1, 1, 1)
+    assert [
+        (result["index"], result["status"], result["detail"])
+        for result in body["results"]
+    ] == [
+        (0, "created", None),
+        (1, "conflict", "username already exists"),
+        (2, "invalid", "email: Field required; password: Field required"),
+    ]
+
+
+def test_too_many_rows_are_refused(fake_database, monkeypatch):
+    monkeypatch.setattr(register, "BULK_REGISTER_MAX_ROWS", 2)
+    rows = [user("ana"), user("luis"), user("eva")]
+    response = post_bulk(orjson.dumps(rows), "application/json")
+    assert response.status_code == 413
+    assert fake_database == []
+
+
+def test_malformed_body_is_refused(fake_database):
+    response = post_bulk(b'{"username": "ana"}', "application/json")
+    assert response.status_code == 422
+
+
+def test_failed_batch_keeps_earlier_results(fake_database, monkeypatch):
+    calls = []
+
+    async def hash_passwords(passwords):
+        calls.append(passwords)
+        if len(calls) > 1:
+            raise HTTPException(
+                status_code=503,
+                detail="Too many authentication requests, try again later",
+            )
+        return [f"hashed {password}" for password in passwords]
+
+    monkeypatch.setattr(hashing, "hash_passwords", hash_passwords)
+    monkeypatch.setattr(register, "BULK_REGISTER_BATCH_SIZE", 1)
+    rows = [user("ana"), user("luis"), user("eva")]
+    response = post_bulk(orjson.dumps(rows), "application/json")
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["created"], body["failed"]) == (1, 2)
+    assert [result["status"] for result in body["results"]] == [
+        "created",
+        "failed",
+        "failed",
+    ]
+    assert body["results"][1]["detail"].startswith("Too many")
+    # Nothing after the failed batch was hashed.
+    assert len(calls) == 2
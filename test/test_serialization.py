@@ -0,0 +1,22 @@
+import uuid
+import orjson
+from asyncpg.pgproto import pgproto
+from pydantic import BaseModel
+from managers import serialization
+
+
+class Row(BaseModel):
+    uuid: uuid.UUID
+    title: str
+
+
+def test_rows_encode_asyncpg_uuids():
+    value = uuid.uuid4()
+    # The type asyncpg returns for uuid columns, not uuid.UUID itself.
+    rows = [{"uuid": pgproto.UUID(value.bytes), "title": "Pothole", "amount": 1}]
+    response = serialization.RowsJSONResponse(
+        {"items": serialization.rows_as(Row, rows)}
+    )
+    assert orjson.loads(response.body) == {
+        "items": [{"uuid": str(value), "title": "Pothole"}]
+    }
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_SECONDS = float(os.environ.get("IMPORT_BUDGET_SECONDS", 3.0))
+
+# Runs in a fresh interpreter so the measurement includes every module the app
+# pulls in; any socket connect during import fails the test.
+IMPORT_SCRIPT = """
+import socket
+import sys
+import time
+
+def refuse(*args, **kwargs):
+    raise RuntimeError("network access while importing the app")
+
+socket.socket.connect = refuse
+socket.create_connection = refuse
+
+sys.path.insert(0, "benchmarks")
+import local_settings
+
+local_settings.apply()
+start = time.perf_counter()
+import main
+
+assert main.app.routes
+print(time.perf_counter() - start)
+"""
+
+
+def test_app_imports_without_io_within_budget():
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    elapsed = float(result.stdout.strip().splitlines()[-1])
+    assert elapsed < IMPORT_BUDGET_SECONDS
@@ -0,0 +1,91 @@
+import asyncio
+import uuid
+import databases
+import httpx
+import pytest
+from pydantic import ValidationError
+from sqlalchemy.dialects import postgresql
+import main
+from managers import authorization
+from models.enums_for_models import State
+from schemas.general import ComplaintsSchema
+
+PENDING, DECIDED, MISSING = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    # PENDING moves, DECIDED was approved before, MISSING does not exist.
+    queries = []
+
+    async def fetch_all(self, query, values=None):
+        queries.append(query)
+        if len(queries) == 1:
+            return [{"uuid": PENDING, "status": State.rejected}]
+        return [{"uuid": DECIDED, "status": State.approved}]
+
+    monkeypatch.setattr(databases.Database, "fetch_all", fetch_all)
+    monkeypatch.setitem(
+        main.app.dependency_overrides,
+        authorization.get_current_active_approver,
+        lambda: None,
+    )
+    return queries
+
+
+def post(json: dict):
+    async def request():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            return await c.post("/complaints/status/", json=json)
+
+    return asyncio.run(request())
+
+
+def test_outcomes_follow_request_order(sent):
+    uuids = [MISSING, DECIDED, PENDING, DECIDED]
+    response = post({"uuids": [str(value) for value in uuids], "status": "rejected"})
+    assert response.status_code == 200
+    assert response.json() == {
+        "updated": 1,
+        "results": [
+            {"uuid": str(MISSING), "outcome": "not_found", "status": None},
+            {"uuid": str(DECIDED), "outcome": "not_pending", "status": "approved"},
+            {"uuid": str(PENDING), "outcome": "updated", "status": "rejected"},
+        ],
+    }
+
+
+def test_one_set_based_update_of_pending_rows(sent):
+    post({"uuids": [str(PENDING), str(PENDING), str(DECIDED)], "status": "approved"})
+    update, lookup = sent
+    compiled = update.compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+    # Moving updated_at is what changes the ETag, so cached reads of the
+    # complaint stop getting 304 once its status changed.
+    assert sql.startswith("UPDATE complaints SET status=%(status)s, updated_at=now() ")
+    assert "complaints.uuid = ANY (%(uuids)s::UUID[])" in sql
+    assert "complaints.status = %(status_1)s" in sql
+    assert compiled.params["status_1"] == State.pending
+    # Repeated uuids are sent once, and only the rows that did not move are
+    # looked up again.
+    assert compiled.params["uuids"] == [PENDING, DECIDED]
+    assert lookup.compile(dialect=postgresql.dialect()).params["remaining"] == [DECIDED]
+
+
+def test_no_lookup_when_every_row_moved(sent):
+    post({"uuids": [str(PENDING)], "status": "approved"})
+    assert len(sent) == 1
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"uuids": [str(PENDING)], "status": "pending"},
+        {"uuids": [], "status": "approved"},
+        {"uuids": ["not-a-uuid"], "status": "approved"},
+    ],
+)
+def test_transition_request_is_validated(payload):
+    with pytest.raises(ValidationError):
+        ComplaintsSchema.StatusTransitionIn.model_validate(payload)
@@ -0,0 +1,178 @@
+import asyncio
+import uuid
+import databases
+import pytest
+from fastapi import HTTPException, Request
+from managers import storage, uploads
+
+BOUNDARY = "testboundary"
+
+
+def multipart(*parts: tuple) -> bytes:
+    body = b""
+    for name, value, filename, content_type in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        body += f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n".encode()
+        if content_type is not None:
+            body += f"Content-Type: {content_type}\r\n".encode()
+        body += b"\r\n" + value + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+def request_for(body: bytes, chunk_size: int = 7) -> Request:
+    # Small chunks split boundaries, headers and values across writes.
+    chunks = [body[i : i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+    async def receive():
+        chunk = chunks.pop(0)
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "headers": [
+            (
+                b"content-type",
+                f"multipart/form-data; boundary={BOUNDARY}".encode(),
+            )
+        ],
+    }
+    return Request(scope, receive)
+
+
+def image_body(data: bytes = b"\x89PNG fake image bytes" * 50) -> bytes:
+    return multipart(
+        ("title", b"Pothole", None, None),
+        ("description", "Deep one \N{CONSTRUCTION SIGN}".encode(), None, None),
+        ("photo", data, "hole.png", "image/png"),
+    )
+
+
+@pytest.fixture
+def local_storage(tmp_path, monkeypatch):
+    backend = storage.LocalStorage(str(tmp_path))
+    monkeypatch.setattr(uploads, "storage", backend)
+    return backend
+
+
+def test_parser_streams_fields_and_file_chunks():
+    async def collect():
+        return [event async for event in uploads.iter_multipart(request_for(body))]
+
+    data = b"0123456789" * 40
+    body = image_body(data)
+    events = asyncio.run(collect())
+    assert events[:3] == [
+        ("field", "title", "Pothole"),
+        ("field", "description", "Deep one \N{CONSTRUCTION SIGN}"),
+        ("file", "photo", "hole.png", "image/png"),
+    ]
+    chunks = [event[1] for event in events[3:]]
+    assert all(event[0] == "data" for event in events[3:])
+    assert len(chunks) > 1
+    assert b"".join(chunks) == data
+
+
+def test_large_form_fields_are_refused(monkeypatch):
+    monkeypatch.setattr(uploads, "FORM_FIELDS_MAX_BYTES", 100)
+    body = multipart(("title", b"x" * 200, None, None))
+
+    async def collect():
+        return [event async for event in uploads.iter_multipart(request_for(body))]
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(collect())
+    assert error.value.status_code == 413
+
+
+def test_identical_images_share_one_stored_object(local_storage):
+    async def receive_twice():
+        first = await uploads.receive_image(request_for(image_body()), "title")
+        second = await uploads.receive_image(request_for(image_body()), "title")
+        return first, second
+
+    (fields, first), (_, second) = asyncio.run(receive_twice())
+    assert fields["title"] == "Pothole"
+    assert first.key == second.key
+    assert first.key.startswith("sha256/") and first.key.endswith(".png")
+    assert (first.created, second.created) == (True, False)
+    assert (
+        local_storage.path(first.key).read_bytes() == b"\x89PNG fake image bytes" * 50
+    )
+    assert list((local_storage.root / "tmp").iterdir()) == []
+
+
+def test_rejected_upload_leaves_no_file(local_storage):
+    # The image is streamed to a temporary file before the missing field is
+    # noticed.
+    body = multipart(("photo", b"\x89PNG", "hole.png", "image/png"))
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(uploads.receive_image(request_for(body), "title"))
+    assert error.value.status_code == 422
+    assert [path for path in local_storage.root.rglob("*") if path.is_file()] == []
+
+
+def test_discard_image_keeps_objects_of_earlier_photos(local_storage, monkeypatch):
+    async def fetch_val(self, query, values=None, column=0):
+        return None
+
+    monkeypatch.setattr(databases.Database, "fetch_val", fetch_val)
+
+    async def scenario():
+        _, earlier = await uploads.receive_image(request_for(image_body()), "title")
+        _, again = await uploads.receive_image(request_for(image_body()), "title")
+        await uploads.discard_image(again)
+        kept = local_storage.path(earlier.key).exists()
+        await uploads.discard_image(earlier)
+        return kept, local_storage.path(earlier.key).exists()
+
+    assert asyncio.run(scenario()) == (True, False)
+
+
+def test_discard_image_keeps_objects_a_photo_references(local_storage, monkeypatch):
+    # The request created the object, but a concurrent request with the same
+    # content has since stored a photo row pointing at it.
+    async def fetch_val(self, query, values=None, column=0):
+        return uuid.uuid4()
+
+    monkeypatch.setattr(databases.Database, "fetch_val", fetch_val)
+
+    async def scenario():
+        _, image = await uploads.receive_image(request_for(image_body()), "title")
+        await uploads.discard_image(image)
+        return image
+
+    image = asyncio.run(scenario())
+    assert image.created
+    assert local_storage.path(image.key).exists()
+
+
+def test_concurrent_identical_commits_create_one_object(local_storage):
+    async def scenario():
+        first, second = (
+            await local_storage.open_upload(),
+            await local_storage.open_upload(),
+        )
+        for upload in (first, second):
+            await upload.write(b"same bytes")
+        keys = await asyncio.gather(
+            local_storage.commit(first, ".png"), local_storage.commit(second, ".png")
+        )
+        return keys, first, second
+
+    (first_key, second_key), first, second = asyncio.run(scenario())
+    assert first_key == second_key
+    assert sorted((first.created, second.created)) == [False, True]
+    assert local_storage.path(first_key).read_bytes() == b"same bytes"
+    assert list((local_storage.root / "tmp").iterdir()) == []
+
+
+def test_backends_must_implement_every_method():
+    class Partial(storage.StorageBackend):
+        async def open_upload(self):
+            pass
+
+    with pytest.raises(TypeError):
+        Partial()